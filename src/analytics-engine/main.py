@@ -5,23 +5,33 @@ HIPAA compliant with comprehensive security and audit logging
 """
 
 import os
-import json
+import orjson
 import logging
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+import time
+import functools
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Any, Sequence, Tuple
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
-import hashlib
-import secrets
+import blake3
+import xxhash
+from ulid import ULID
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, Depends, Security, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Depends, Security, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from azure.core.exceptions import ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
 from azure.storage.filedatalake import DataLakeServiceClient
 from azure.keyvault.secrets import SecretClient
@@ -29,7 +39,7 @@ from azure.monitor.opentelemetry import configure_azure_monitor
 from opentelemetry import trace
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 import redis.asyncio as aioredis
-from prometheus_client import Counter, Histogram, generate_latest
+from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
 import structlog
 
 # Configure structured logging
@@ -58,6 +68,17 @@ REQUESTS_TOTAL = Counter('analytics_requests_total', 'Total requests', ['method'
 REQUEST_DURATION = Histogram('analytics_request_duration_seconds', 'Request duration')
 ANALYTICS_QUERIES = Counter('analytics_queries_total', 'Total analytics queries', ['query_type'])
 
+# Resolved label children, so hot paths skip the labels() lookup
+_request_counters: Dict[tuple, Any] = {}
+
+def request_counter(method: str, endpoint: str, status: int):
+    """Return the cached REQUESTS_TOTAL child for a label combination"""
+    key = (method, endpoint, status)
+    counter = _request_counters.get(key)
+    if counter is None:
+        counter = _request_counters[key] = REQUESTS_TOTAL.labels(method=method, endpoint=endpoint, status=status)
+    return counter
+
 @dataclass
 class AnalyticsRequest:
     """Analytics request model"""
@@ -66,6 +87,21 @@ class AnalyticsRequest:
     filters: Optional[Dict[str, Any]] = None
     date_range: Optional[Dict[str, str]] = None
     aggregation: Optional[str] = None
+    
+    def frozen_key(self) -> tuple:
+        """Hashable, order-independent view of the fields that identify a result"""
+        return (
+            self.query_type,
+            self.aggregation,
+            tuple(sorted((self.filters or {}).items())),
+            tuple(sorted((self.parameters or {}).items())),
+            tuple(sorted((self.date_range or {}).items()))
+        )
+
+@functools.lru_cache(maxsize=1024)
+def _derive_cache_key(frozen: tuple) -> str:
+    """Hash a frozen request into its cache key, memoized for repeated queries"""
+    return f"analytics:{xxhash.xxh3_64_hexdigest(repr(frozen).encode())}"
 
 @dataclass
 class AnalyticsResult:
@@ -89,6 +125,22 @@ class SecurityManager:
                 vault_url=self.key_vault_url,
                 credential=self.credential
             )
+        self.pseudonym_key = self._load_pseudonym_key()
+    
+    def _load_pseudonym_key(self) -> bytes:
+        """32-byte key for audit pseudonyms; every worker and restart must share it"""
+        # A per-process fallback would make pseudonyms uncorrelatable across
+        # workers, defeating their purpose, so refuse to start without the key
+        key_hex = os.environ.get('AUDIT_PSEUDONYM_KEY')
+        if not key_hex:
+            raise RuntimeError("AUDIT_PSEUDONYM_KEY must be set to a 32-byte hex key")
+        try:
+            key = bytes.fromhex(key_hex)
+        except ValueError:
+            raise RuntimeError("AUDIT_PSEUDONYM_KEY is not valid hex") from None
+        if len(key) != 32:
+            raise RuntimeError(f"AUDIT_PSEUDONYM_KEY must be 32 bytes, got {len(key)}")
+        return key
     
     async def validate_token(self, token: str) -> Dict[str, Any]:
         """Validate JWT token"""
@@ -102,18 +154,104 @@ class SecurityManager:
     
     def generate_query_id(self) -> str:
         """Generate unique query ID for tracking"""
-        return f"query_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(8)}"
+        # Time-ordered ULID: 48-bit ms timestamp + 80 random bits
+        return f"query_{ULID()}"
     
     def hash_sensitive_data(self, data: str) -> str:
-        """Hash sensitive data for logging"""
-        return hashlib.sha256(data.encode()).hexdigest()[:16]
+        """Hash sensitive data for logging (keyed BLAKE3, 64-bit pseudonym)"""
+        return blake3.blake3(data.encode(), key=self.pseudonym_key).hexdigest(8)
+
+# Synthetic dataset dictionaries
+AGE_GROUPS = ['18-30', '31-45', '46-60', '60+']
+GENDERS = ['M', 'F', 'O']
+DIAGNOSIS_CODES = ['Z00.00', 'I10', 'E11.9', 'J44.1']
+METRIC_NAMES = ['Blood Pressure', 'Heart Rate', 'Temperature', 'Oxygen Saturation']
+METRIC_UNITS = ['mmHg', 'bpm', '°F', '%']
+
+# Seeded PCG64 generator for the synthetic datasets; avoids the legacy
+# global RandomState and its lock, and keeps the data reproducible
+_rng = np.random.default_rng(int(os.getenv('SYNTHETIC_DATA_SEED', '42')))
+
+def _dictionary_column(values: List[str], size: int) -> pa.DictionaryArray:
+    """Dictionary-encoded column of randomly drawn values"""
+    codes = _rng.integers(0, len(values), size, dtype=np.int8)
+    return pa.DictionaryArray.from_arrays(codes, pa.array(values))
+
+# Simulated readmission and cost results, shared rather than rebuilt per call;
+# asdict() copies them into each AnalyticsResult
+READMISSION_RESULT: Tuple[Dict[str, Any], ...] = (
+    {"period": "30_days", "readmission_rate": 0.15, "count": 450},
+    {"period": "90_days", "readmission_rate": 0.25, "count": 750},
+    {"period": "1_year", "readmission_rate": 0.40, "count": 1200}
+)
+COST_RESULT: Tuple[Dict[str, Any], ...] = (
+    {"category": "Emergency Care", "average_cost": 5500.00, "total_cases": 2500},
+    {"category": "Inpatient Care", "average_cost": 15000.00, "total_cases": 1800},
+    {"category": "Outpatient Care", "average_cost": 750.00, "total_cases": 8500},
+    {"category": "Preventive Care", "average_cost": 300.00, "total_cases": 12000}
+)
+
+# Parquet schema metadata key holding the non-tabular result fields
+RESULT_METADATA_KEY = b'analytics_result'
+
+# Query types expensive enough to persist to the Data Lake and read back on a
+# Redis miss; the rest are cheaper to recompute than to download
+PERSISTED_QUERY_TYPES = frozenset(("patient_demographics", "clinical_metrics"))
+
+def _prefixed_ids(prefix: str, numbers: np.ndarray) -> np.ndarray:
+    """Vectorized equivalent of f'{prefix}{n:06d}' over an integer array"""
+    return np.char.add(prefix, np.char.zfill(numbers.astype('U6'), 6))
+
+def _build_demographics_batch(size: int = 1000) -> pa.RecordBatch:
+    """Build the immutable patient demographics dataset"""
+    return pa.RecordBatch.from_pydict({
+        'patient_id': pa.array(_prefixed_ids('P', np.arange(size))),
+        'age_group': _dictionary_column(AGE_GROUPS, size),
+        'gender': _dictionary_column(GENDERS, size),
+        'diagnosis_code': _dictionary_column(DIAGNOSIS_CODES, size),
+        'admission_date': pa.array(pd.date_range('2023-01-01', periods=size, freq='D'))
+    })
+
+def _build_clinical_batch(size: int = 500) -> pa.RecordBatch:
+    """Build the immutable clinical metrics dataset"""
+    return pa.RecordBatch.from_pydict({
+        'metric_id': pa.array(_prefixed_ids('M', np.arange(size))),
+        'metric_name': _dictionary_column(METRIC_NAMES, size),
+        'value': pa.array(_rng.normal(100, 15, size)),
+        'unit': _dictionary_column(METRIC_UNITS, size),
+        'measurement_date': pa.array(pd.date_range('2023-01-01', periods=size, freq='H')),
+        'patient_id': pa.array(_prefixed_ids('P', _rng.integers(1, 1000, size)))
+    })
+
+def _filter_scalar(batch: pa.RecordBatch, column: str, value: Any) -> pa.Scalar:
+    """Filter value as a scalar of the column's value type; null if it cannot be one"""
+    column_type = batch.schema.field(column).type
+    if pa.types.is_dictionary(column_type):
+        column_type = column_type.value_type
+    try:
+        return pa.scalar(value).cast(column_type)
+    except (pa.ArrowException, TypeError):
+        # Matches nothing, as comparing mismatched values does in pandas
+        return pa.scalar(None, type=column_type)
+
+def _arrow_types_mapper(arrow_type: pa.DataType) -> Optional[Any]:
+    """Keep string columns Arrow-backed; dictionary columns become pandas categoricals"""
+    if pa.types.is_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    return None
 
 class DataLakeClient:
     """HIPAA-compliant Data Lake client"""
     
+    # Simulated datasets, built once and shared by every query
+    _demographics_batch = _build_demographics_batch()
+    _clinical_batch = _build_clinical_batch()
+    
     def __init__(self):
         self.credential = DefaultAzureCredential()
         self.account_url = os.environ.get('DATA_LAKE_URL')
+        self.results_file_system = os.environ.get('ANALYTICS_RESULTS_FILE_SYSTEM', 'analytics-results')
+        self.client = None
         if self.account_url:
             self.client = DataLakeServiceClient(
                 account_url=self.account_url,
@@ -124,22 +262,14 @@ class DataLakeClient:
         """Query patient demographic data"""
         try:
             # Simulate data query - in production, implement actual Data Lake queries
-            data = {
-                'patient_id': [f'P{i:06d}' for i in range(1000)],
-                'age_group': np.random.choice(['18-30', '31-45', '46-60', '60+'], 1000),
-                'gender': np.random.choice(['M', 'F', 'O'], 1000),
-                'diagnosis_code': np.random.choice(['Z00.00', 'I10', 'E11.9', 'J44.1'], 1000),
-                'admission_date': pd.date_range('2023-01-01', periods=1000, freq='D')
-            }
-            df = pd.DataFrame(data)
+            batch = self._demographics_batch
             
-            # Apply filters
-            if filters.get('age_group'):
-                df = df[df['age_group'] == filters['age_group']]
-            if filters.get('gender'):
-                df = df[df['gender'] == filters['gender']]
+            # Apply filters on the Arrow batch before converting to pandas
+            for column in ('age_group', 'gender'):
+                if filters.get(column):
+                    batch = batch.filter(pc.equal(batch[column], _filter_scalar(batch, column, filters[column])))
             
-            return df
+            return batch.to_pandas(types_mapper=_arrow_types_mapper)
         except Exception as e:
             logger.error("Failed to query patient demographics", error=str(e))
             raise
@@ -148,19 +278,41 @@ class DataLakeClient:
         """Query clinical metrics data"""
         try:
             # Simulate clinical metrics data
-            data = {
-                'metric_id': [f'M{i:06d}' for i in range(500)],
-                'metric_name': np.random.choice(['Blood Pressure', 'Heart Rate', 'Temperature', 'Oxygen Saturation'], 500),
-                'value': np.random.normal(100, 15, 500),
-                'unit': np.random.choice(['mmHg', 'bpm', '°F', '%'], 500),
-                'measurement_date': pd.date_range('2023-01-01', periods=500, freq='H'),
-                'patient_id': [f'P{np.random.randint(1, 1000):06d}' for _ in range(500)]
-            }
-            return pd.DataFrame(data)
+            return self._clinical_batch.to_pandas(types_mapper=_arrow_types_mapper)
         except Exception as e:
             logger.error("Failed to query clinical metrics", error=str(e))
             raise
 
+    def _result_file(self, query_type: str, cache_key: str):
+        """Result file partitioned by query type and date"""
+        file_name = cache_key.split(':')[-1]
+        return self.client.get_file_client(
+            self.results_file_system,
+            f"{query_type}/{date.today().isoformat()}/{file_name}.parquet"
+        )
+    
+    def write_result_table(self, query_type: str, cache_key: str, result: Dict[str, Any]):
+        """Persist an analytics result as a zstd-compressed Parquet file"""
+        table = pa.Table.from_pylist(result['data'])
+        header = {key: value for key, value in result.items() if key != 'data'}
+        table = table.replace_schema_metadata({RESULT_METADATA_KEY: orjson.dumps(header, default=str)})
+        
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression='zstd', use_dictionary=True)
+        self._result_file(query_type, cache_key).upload_data(sink.getvalue().to_pybytes(), overwrite=True)
+    
+    def read_result_table(self, query_type: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Load a persisted analytics result; each file already holds exactly one request's rows"""
+        try:
+            data = self._result_file(query_type, cache_key).download_file().readall()
+        except ResourceNotFoundError:
+            return None
+        
+        table = pq.read_table(pa.BufferReader(data))
+        result = orjson.loads(table.schema.metadata[RESULT_METADATA_KEY])
+        result['data'] = table.to_pylist()
+        return result
+
 class CacheManager:
     """Redis cache manager for analytics results"""
     
@@ -168,34 +320,75 @@ class CacheManager:
         self.redis_url = os.environ.get('REDIS_URL', 'redis://localhost:6379')
         self.redis_client = None
         self.cache_ttl = int(os.environ.get('CACHE_TTL', '3600'))  # 1 hour default
+        self.max_connections = int(os.environ.get('REDIS_MAX_CONNECTIONS', '64'))
+        self._client_lock = asyncio.Lock()
     
     async def get_client(self):
-        """Get Redis client"""
-        if not self.redis_client:
-            self.redis_client = await aioredis.from_url(self.redis_url)
+        """Get Redis client, creating the shared connection pool once"""
+        if self.redis_client is None:
+            async with self._client_lock:
+                if self.redis_client is None:
+                    # Raw bytes in and out; RESP parsing is done by hiredis when installed
+                    self.redis_client = await aioredis.from_url(
+                        self.redis_url,
+                        decode_responses=False,
+                        max_connections=self.max_connections,
+                        health_check_interval=30
+                    )
         return self.redis_client
     
+    async def close(self):
+        """Close the Redis connection pool"""
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
+            self.redis_client = None
+    
+    @staticmethod
+    def _serialize(result: Dict[str, Any]) -> bytes:
+        return orjson.dumps(result, default=str,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC)
+    
     async def get_cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Get cached analytics result"""
         try:
             client = await self.get_client()
             cached_data = await client.get(cache_key)
             if cached_data:
-                return json.loads(cached_data)
+                return orjson.loads(cached_data)
             return None
         except Exception as e:
             logger.warning("Cache retrieval failed", error=str(e))
             return None
     
-    async def cache_result(self, cache_key: str, result: Dict[str, Any]):
-        """Cache analytics result"""
+    async def cache_result(self, cache_key: str, result: Dict[str, Any], ttl: Optional[int] = None):
+        """Cache analytics result, for the full cache TTL unless told otherwise"""
         try:
             client = await self.get_client()
-            await client.setex(
-                cache_key,
-                self.cache_ttl,
-                json.dumps(result, default=str)
-            )
+            await client.set(cache_key, self._serialize(result), ex=ttl or self.cache_ttl)
+        except Exception as e:
+            logger.warning("Cache storage failed", error=str(e))
+    
+    async def get_cached_results(self, cache_keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Get several cached analytics results in a single round trip"""
+        try:
+            client = await self.get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                for cache_key in cache_keys:
+                    pipe.get(cache_key)
+                cached = await pipe.execute()
+            return [orjson.loads(data) if data else None for data in cached]
+        except Exception as e:
+            logger.warning("Cache retrieval failed", error=str(e))
+            return [None] * len(cache_keys)
+    
+    async def cache_results(self, results: Dict[str, Dict[str, Any]]):
+        """Cache several analytics results in a single round trip"""
+        try:
+            client = await self.get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                for cache_key, result in results.items():
+                    pipe.set(cache_key, self._serialize(result), ex=self.cache_ttl)
+                await pipe.execute()
         except Exception as e:
             logger.warning("Cache storage failed", error=str(e))
 
@@ -206,20 +399,41 @@ class AnalyticsEngine:
         self.data_lake = DataLakeClient()
         self.cache = CacheManager()
         self.security = SecurityManager()
+        self._background_tasks = set()
+        self._handlers = {
+            "patient_demographics": self._run_demographics,
+            "clinical_metrics": self._run_clinical,
+            "readmission_analysis": self._analyze_readmissions,
+            "cost_analysis": self._analyze_costs
+        }
     
     def generate_cache_key(self, request: AnalyticsRequest) -> str:
         """Generate cache key for request"""
-        request_str = json.dumps(asdict(request), sort_keys=True)
-        return f"analytics:{hashlib.md5(request_str.encode()).hexdigest()}"
+        frozen = request.frozen_key()
+        try:
+            return _derive_cache_key(frozen)
+        except TypeError:
+            # Unhashable filter or parameter values (lists, nested dicts)
+            return _derive_cache_key.__wrapped__(frozen)
     
     async def execute_analytics_query(self, request: AnalyticsRequest, user_context: Dict[str, Any]) -> AnalyticsResult:
         """Execute analytics query with caching"""
         query_id = self.security.generate_query_id()
-        start_time = datetime.utcnow()
+        start = time.perf_counter()
         
         # Check cache first
         cache_key = self.generate_cache_key(request)
         cached_result = await self.cache.get_cached_result(cache_key)
+        if cached_result is None and request.query_type in PERSISTED_QUERY_TYPES:
+            # Fall back to a persisted result that is still within the cache TTL,
+            # and re-warm Redis for the rest of its lifetime only
+            cached_result = await self._load_persisted_result(request.query_type, cache_key)
+            if cached_result:
+                remaining_ttl = self._remaining_ttl(cached_result)
+                if remaining_ttl > 0:
+                    await self.cache.cache_result(cache_key, cached_result, ttl=remaining_ttl)
+                else:
+                    cached_result = None
         
         if cached_result:
             logger.info("Cache hit for analytics query", 
@@ -230,22 +444,16 @@ class AnalyticsEngine:
             cached_result['cache_hit'] = True
             return AnalyticsResult(**cached_result)
         
+        handler = self._handlers.get(request.query_type)
+        if handler is None:
+            raise HTTPException(status_code=400, detail=f"Unsupported query type: {request.query_type}")
+        
         # Execute query
+        executed_at = datetime.utcnow().isoformat()
         try:
-            if request.query_type == "patient_demographics":
-                df = await self.data_lake.query_patient_demographics(request.filters or {})
-                result_data = self._process_demographic_analytics(df, request)
-            elif request.query_type == "clinical_metrics":
-                df = await self.data_lake.query_clinical_metrics(request.filters or {})
-                result_data = self._process_clinical_analytics(df, request)
-            elif request.query_type == "readmission_analysis":
-                result_data = await self._analyze_readmissions(request)
-            elif request.query_type == "cost_analysis":
-                result_data = await self._analyze_costs(request)
-            else:
-                raise HTTPException(status_code=400, detail=f"Unsupported query type: {request.query_type}")
+            result_data = await handler(request)
             
-            execution_time = (datetime.utcnow() - start_time).total_seconds()
+            execution_time = time.perf_counter() - start
             
             result = AnalyticsResult(
                 query_id=query_id,
@@ -253,15 +461,17 @@ class AnalyticsEngine:
                 result_count=len(result_data),
                 data=result_data,
                 metadata={
-                    "executed_at": start_time.isoformat(),
+                    "executed_at": executed_at,
                     "filters_applied": request.filters,
                     "user_id": self.security.hash_sensitive_data(user_context.get('user_id', ''))
                 },
                 execution_time=execution_time
             )
             
-            # Cache result
-            await self.cache.cache_result(cache_key, asdict(result))
+            # Cache result, and persist it to the Data Lake off the request path
+            result_dict = asdict(result)
+            await self.cache.cache_result(cache_key, result_dict)
+            self._persist_result(request.query_type, cache_key, result_dict)
             
             # Record metrics
             ANALYTICS_QUERIES.labels(query_type=request.query_type).inc()
@@ -281,47 +491,118 @@ class AnalyticsEngine:
                         error=str(e))
             raise HTTPException(status_code=500, detail="Analytics query failed")
     
+    async def _load_persisted_result(self, query_type: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Read a persisted result table, if the Data Lake is configured"""
+        if self.data_lake.client is None:
+            return None
+        try:
+            return await asyncio.to_thread(self.data_lake.read_result_table, query_type, cache_key)
+        except Exception as e:
+            logger.warning("Persisted result retrieval failed", error=str(e))
+            return None
+    
+    def _remaining_ttl(self, result: Dict[str, Any]) -> int:
+        """Seconds a persisted result stays fresh, from its executed_at; 0 once stale or undated"""
+        try:
+            executed_at = datetime.fromisoformat(result['metadata']['executed_at'])
+        except (KeyError, TypeError, ValueError):
+            return 0
+        age = (datetime.utcnow() - executed_at).total_seconds()
+        return max(0, int(self.cache.cache_ttl - age))
+    
+    def _persist_result(self, query_type: str, cache_key: str, result: Dict[str, Any]):
+        """Write the result table to the Data Lake in the background"""
+        if self.data_lake.client is None or query_type not in PERSISTED_QUERY_TYPES:
+            return
+        
+        async def persist():
+            try:
+                await asyncio.to_thread(self.data_lake.write_result_table, query_type, cache_key, result)
+            except Exception as e:
+                logger.warning("Result persistence failed", error=str(e))
+        
+        task = asyncio.create_task(persist())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def _run_demographics(self, request: AnalyticsRequest) -> List[Dict[str, Any]]:
+        """Fetch and aggregate patient demographics"""
+        df = await self.data_lake.query_patient_demographics(request.filters or {})
+        return await asyncio.to_thread(self._process_demographic_analytics, df, request)
+    
+    async def _run_clinical(self, request: AnalyticsRequest) -> List[Dict[str, Any]]:
+        """Fetch and aggregate clinical metrics"""
+        df = await self.data_lake.query_clinical_metrics(request.filters or {})
+        return await asyncio.to_thread(self._process_clinical_analytics, df, request)
+    
     def _process_demographic_analytics(self, df: pd.DataFrame, request: AnalyticsRequest) -> List[Dict[str, Any]]:
         """Process demographic analytics"""
         if request.aggregation == "age_distribution":
-            result = df.groupby('age_group').size().reset_index(name='count')
+            keys = ['age_group']
         elif request.aggregation == "gender_distribution":
-            result = df.groupby('gender').size().reset_index(name='count')
+            keys = ['gender']
         else:
-            result = df.groupby(['age_group', 'gender']).size().reset_index(name='count')
+            keys = ['age_group', 'gender']
         
-        return result.to_dict('records')
+        # Count on the categorical codes: one bincount over a flat index of
+        # (age_group, gender) cells instead of building a pandas groupby
+        columns = [df[key].astype('category').cat for key in keys]
+        shape = tuple(len(column.categories) for column in columns)
+        codes = [column.codes.to_numpy(dtype=np.int64) for column in columns]
+        valid = np.logical_and.reduce([c >= 0 for c in codes])
+        flat = np.ravel_multi_index(tuple(c[valid] for c in codes), shape)
+        counts = np.bincount(flat, minlength=int(np.prod(shape)))
+        
+        # Only report observed groups, as groupby on plain labels would
+        observed = np.flatnonzero(counts)
+        cells = np.unravel_index(observed, shape)
+        labels = [column.categories[cell] for column, cell in zip(columns, cells)]
+        return [
+            {**dict(zip(keys, group)), 'count': int(count)}
+            for group, count in zip(zip(*labels), counts[observed])
+        ]
     
     def _process_clinical_analytics(self, df: pd.DataFrame, request: AnalyticsRequest) -> List[Dict[str, Any]]:
         """Process clinical metrics analytics"""
         if request.aggregation == "average_by_metric":
-            result = df.groupby('metric_name')['value'].agg(['mean', 'std', 'count']).reset_index()
+            result = df.groupby('metric_name', observed=True)['value'].agg(['mean', 'std', 'count']).reset_index()
         elif request.aggregation == "trends":
-            df['date'] = pd.to_datetime(df['measurement_date']).dt.date
-            result = df.groupby(['date', 'metric_name'])['value'].mean().reset_index()
+            # Truncate to days as datetime64 so grouping stays on int64 keys
+            df['date'] = df['measurement_date'].values.astype('datetime64[D]')
+            result = df.groupby(['date', 'metric_name'], sort=False, observed=True)['value'].mean().reset_index()
+            result['date'] = result['date'].dt.strftime('%Y-%m-%d')
         else:
-            result = df.describe().reset_index()
+            # describe() reports the datetime column's stats as Timestamps,
+            # which orjson cannot serialize; emit them as ISO strings
+            result = df.describe().reset_index().map(
+                lambda cell: cell.isoformat() if isinstance(cell, pd.Timestamp) else cell
+            )
         
         return result.to_dict('records')
     
-    async def _analyze_readmissions(self, request: AnalyticsRequest) -> List[Dict[str, Any]]:
+    async def _analyze_readmissions(self, request: AnalyticsRequest) -> Sequence[Dict[str, Any]]:
         """Analyze readmission patterns"""
         # Simulated readmission analysis
-        return [
-            {"period": "30_days", "readmission_rate": 0.15, "count": 450},
-            {"period": "90_days", "readmission_rate": 0.25, "count": 750},
-            {"period": "1_year", "readmission_rate": 0.40, "count": 1200}
-        ]
+        return READMISSION_RESULT
     
-    async def _analyze_costs(self, request: AnalyticsRequest) -> List[Dict[str, Any]]:
+    async def _analyze_costs(self, request: AnalyticsRequest) -> Sequence[Dict[str, Any]]:
         """Analyze healthcare costs"""
         # Simulated cost analysis
-        return [
-            {"category": "Emergency Care", "average_cost": 5500.00, "total_cases": 2500},
-            {"category": "Inpatient Care", "average_cost": 15000.00, "total_cases": 1800},
-            {"category": "Outpatient Care", "average_cost": 750.00, "total_cases": 8500},
-            {"category": "Preventive Care", "average_cost": 300.00, "total_cases": 12000}
-        ]
+        return COST_RESULT
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared connections at startup and release them on shutdown"""
+    # Bounded pool for to_thread offloads (pandas processing, Parquet I/O)
+    executor = ThreadPoolExecutor(
+        max_workers=int(os.getenv("ANALYTICS_THREAD_WORKERS", str(2 * (os.cpu_count() or 1)))),
+        thread_name_prefix="analytics"
+    )
+    asyncio.get_running_loop().set_default_executor(executor)
+    app.state.redis = await analytics_engine.cache.get_client()
+    yield
+    await analytics_engine.cache.close()
+    executor.shutdown(wait=False)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -329,7 +610,8 @@ app = FastAPI(
     description="HIPAA-compliant analytics engine for healthcare data",
     version="1.0.0",
     docs_url="/docs" if os.getenv("ENVIRONMENT") != "prod" else None,
-    redoc_url="/redoc" if os.getenv("ENVIRONMENT") != "prod" else None
+    redoc_url="/redoc" if os.getenv("ENVIRONMENT") != "prod" else None,
+    lifespan=lifespan
 )
 
 # Security
@@ -345,6 +627,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large analytics payloads; small responses go out as-is
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "1024")),
+    compresslevel=5
+)
+
 # Trusted hosts
 app.add_middleware(
     TrustedHostMiddleware,
@@ -363,49 +652,93 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(
     token = credentials.credentials
     return await analytics_engine.security.validate_token(token)
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all requests for audit trail"""
-    start_time = datetime.utcnow()
-    
-    # Log request
-    logger.info("Request received",
-               method=request.method,
-               url=str(request.url),
-               client_ip=request.client.host,
-               user_agent=request.headers.get("user-agent"))
-    
-    response = await call_next(request)
-    
-    # Log response
-    duration = (datetime.utcnow() - start_time).total_seconds()
-    logger.info("Request completed",
-               method=request.method,
-               url=str(request.url),
-               status_code=response.status_code,
-               duration=duration)
-    
-    # Record metrics
-    REQUESTS_TOTAL.labels(
-        method=request.method,
-        endpoint=request.url.path,
-        status=response.status_code
-    ).inc()
-    REQUEST_DURATION.observe(duration)
-    
-    return response
+class RequestAuditMiddleware:
+    """
+    Pure ASGI middleware logging completed requests for the audit trail
+    
+    Only inspects the scope and the response start message, avoiding the
+    response re-wrapping done by BaseHTTPMiddleware.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            client = scope.get("client")
+            logger.info("Request completed",
+                       method=scope["method"],
+                       path=scope["path"],
+                       client_ip=client[0] if client else None,
+                       status_code=status_code,
+                       duration=duration)
+            
+            # Record metrics
+            request_counter(scope["method"], scope["path"], status_code).inc()
+            REQUEST_DURATION.observe(duration)
+
+app.add_middleware(RequestAuditMiddleware)
+
+def _health_response() -> ORJSONResponse:
+    return ORJSONResponse({"status": "healthy", "timestamp": datetime.utcnow().isoformat()})
+
+def _metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+class ProbeFastPathMiddleware:
+    """
+    Outermost ASGI middleware answering liveness probes and metric scrapes
+    
+    These are polled every few seconds, so they skip the host, CORS, gzip,
+    tracing and audit layers and the router entirely.
+    """
+    
+    PROBE_RESPONSES = {"/health": _health_response, "/metrics": _metrics_response}
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            build_response = self.PROBE_RESPONSES.get(scope["path"])
+            if build_response is not None:
+                await build_response()(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+app.add_middleware(ProbeFastPathMiddleware)
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return _health_response()
 
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint"""
-    return generate_latest()
+    return _metrics_response()
 
-@app.post("/analytics/query", response_model=AnalyticsResult)
+@app.post(
+    "/analytics/query",
+    response_class=ORJSONResponse,
+    responses={200: {"model": AnalyticsResult}}
+)
 async def execute_analytics(
     request: AnalyticsRequest,
     background_tasks: BackgroundTasks,
@@ -424,7 +757,8 @@ async def execute_analytics(
             result_count=result.result_count
         )
         
-        return result
+        # Serialize directly, skipping response_model re-validation of the payload
+        return ORJSONResponse(asdict(result))
     except HTTPException:
         raise
     except Exception as e:
@@ -476,6 +810,10 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", "8001")),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
         log_level=os.getenv("LOG_LEVEL", "info").lower(),
-        access_log=True
+        # Requests are already logged by RequestAuditMiddleware
+        access_log=False
     )
@@ -5,21 +5,28 @@ HIPAA compliant with comprehensive security, rate limiting, and audit logging
 """
 
 import os
-import json
+import orjson
 import logging
 import asyncio
+import random
+import shutil
+import sys
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator, NamedTuple, Union
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
+from enum import Enum
 import hashlib
-import secrets
+import blake3
+from ulid import ULID
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, Depends, Security, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Depends, Security, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 import httpx
 from azure.identity import DefaultAzureCredential
 from azure.keyvault.secrets import SecretClient
@@ -28,12 +35,19 @@ from opentelemetry import trace
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
 import redis.asyncio as aioredis
-from prometheus_client import Counter, Histogram, generate_latest
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
 import structlog
+from cachetools import TTLCache
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
+def _orjson_dumps(obj: Any, **kwargs) -> str:
+    """orjson serializer for structlog; stdlib logging expects str"""
+    return orjson.dumps(obj, **kwargs).decode()
+
 # Configure structured logging
 structlog.configure(
     processors=[
@@ -42,10 +56,9 @@ structlog.configure(
         structlog.stdlib.add_log_level,
         structlog.stdlib.PositionalArgumentsFormatter(),
         structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
         structlog.processors.format_exc_info,
         structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
+        structlog.processors.JSONRenderer(serializer=_orjson_dumps)
     ],
     context_class=dict,
     logger_factory=structlog.stdlib.LoggerFactory(),
@@ -57,9 +70,13 @@ logger = structlog.get_logger()
 
 # Metrics
 REQUESTS_TOTAL = Counter('gateway_requests_total', 'Total requests', ['method', 'endpoint', 'status', 'service'])
-REQUEST_DURATION = Histogram('gateway_request_duration_seconds', 'Request duration', ['service'])
+REQUEST_DURATION = Histogram(
+    'gateway_request_duration_seconds', 'Request duration', ['service'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
 RATE_LIMIT_HITS = Counter('gateway_rate_limit_hits_total', 'Rate limit hits', ['endpoint'])
 CIRCUIT_BREAKER_OPENS = Counter('gateway_circuit_breaker_opens_total', 'Circuit breaker opens', ['service'])
+AUDIT_RECORDS_DROPPED = Counter('gateway_audit_records_dropped_total', 'Audit records dropped on a full queue')
 
 @dataclass
 class ServiceConfig:
@@ -76,14 +93,69 @@ class SecurityManager:
     def __init__(self):
         self.credential = DefaultAzureCredential()
         self.key_vault_url = os.environ.get('KEY_VAULT_URL')
+        self.secret_client = None
         if self.key_vault_url:
             self.secret_client = SecretClient(
                 vault_url=self.key_vault_url,
                 credential=self.credential
             )
+        self._secret_cache = TTLCache(maxsize=256, ttl=int(os.getenv("SECRET_CACHE_TTL", "300")))
+        self.pseudonym_key = self._load_pseudonym_key()
+        # Validated-claims cache, connected by the app lifespan
+        self.token_cache: Optional[aioredis.Redis] = None
+        self.token_cache_max_ttl = int(os.getenv("TOKEN_CACHE_TTL", "300"))
+    
+    async def get_secret(self, name: str) -> str:
+        """Read a Key Vault secret, served from the in-process cache while fresh"""
+        value = self._secret_cache.get(name)
+        if value is not None:
+            return value
+        if self.secret_client is None:
+            raise RuntimeError("KEY_VAULT_URL is not configured")
+        secret = await asyncio.to_thread(self.secret_client.get_secret, name)
+        self._secret_cache[name] = secret.value
+        return secret.value
+    
+    async def prefetch_secrets(self, names: List[str]):
+        """Warm the secret cache so the first requests skip the Key Vault round trip"""
+        if self.secret_client is None:
+            return
+        results = await asyncio.gather(*(self.get_secret(name) for name in names), return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning("Secret prefetch failed", secret=name, error=str(result))
+    
+    @staticmethod
+    def _token_cache_key(token: str) -> str:
+        return f"jwt:{hashlib.sha256(token.encode()).hexdigest()}"
     
     async def validate_token(self, token: str) -> Dict[str, Any]:
-        """Validate JWT token"""
+        """Validate JWT token, reusing cached claims for recently seen tokens"""
+        cache_key = self._token_cache_key(token)
+        if self.token_cache is not None:
+            try:
+                cached = await self.token_cache.get(cache_key)
+                if cached:
+                    return orjson.loads(cached)
+            except Exception as e:
+                # Redis errors and timeouts fall through to full validation
+                logger.warning("Token cache lookup failed", error=str(e))
+        
+        claims = await self._verify_token(token)
+        
+        # Never cache claims beyond the token's own expiry
+        ttl = self.token_cache_max_ttl
+        if 'exp' in claims:
+            ttl = min(ttl, int(claims['exp'] - time.time()))
+        if self.token_cache is not None and ttl > 0:
+            try:
+                await self.token_cache.set(cache_key, orjson.dumps(claims), ex=ttl)
+            except Exception as e:
+                logger.warning("Token cache store failed", error=str(e))
+        return claims
+    
+    async def _verify_token(self, token: str) -> Dict[str, Any]:
+        """Verify JWT token signature and claims"""
         try:
             # In production, implement proper JWT validation with Azure AD
             # This is a placeholder for the validation logic
@@ -96,81 +168,238 @@ class SecurityManager:
             logger.error("Token validation failed", error=str(e))
             raise HTTPException(status_code=401, detail="Invalid token")
     
+    async def revoke_token(self, token: str):
+        """Drop a token's cached claims so the next request re-validates it"""
+        if self.token_cache is not None:
+            await self.token_cache.delete(self._token_cache_key(token))
+    
+    def _load_pseudonym_key(self) -> bytes:
+        """32-byte key for audit pseudonyms; every worker and restart must share it"""
+        # A per-process fallback would make pseudonyms uncorrelatable across
+        # workers, defeating their purpose, so refuse to start without the key
+        key_hex = os.environ.get('AUDIT_PSEUDONYM_KEY')
+        if not key_hex:
+            raise RuntimeError("AUDIT_PSEUDONYM_KEY must be set to a 32-byte hex key")
+        try:
+            key = bytes.fromhex(key_hex)
+        except ValueError:
+            raise RuntimeError("AUDIT_PSEUDONYM_KEY is not valid hex") from None
+        if len(key) != 32:
+            raise RuntimeError(f"AUDIT_PSEUDONYM_KEY must be 32 bytes, got {len(key)}")
+        return key
+    
     def hash_sensitive_data(self, data: str) -> str:
-        """Hash sensitive data for logging"""
-        return hashlib.sha256(data.encode()).hexdigest()[:16]
+        """Hash sensitive data for logging (keyed BLAKE3, 64-bit pseudonym)"""
+        return blake3.blake3(data.encode(), key=self.pseudonym_key).hexdigest(8)
     
     def generate_request_id(self) -> str:
         """Generate unique request ID for tracking"""
-        return f"req_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(8)}"
+        # Time-ordered ULID: 48-bit ms timestamp + 80 random bits
+        return f"req_{ULID()}"
 
 class CircuitBreaker:
     """Circuit breaker for service protection"""
     
-    def __init__(self, threshold: int = 5, timeout: int = 60):
+    def __init__(self, name: str, threshold: int = 5, timeout: int = 60):
+        self.name = name
         self.threshold = threshold
-        self.timeout = timeout
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
+        self.timeout_ns = timeout * 1_000_000_000
+        # (state, failure_count, open_until_ns) swapped as one tuple, so a
+        # reader never sees a half-applied transition;
+        # state is CLOSED, OPEN or HALF_OPEN
+        self._state = ("CLOSED", 0, 0)
+    
+    @property
+    def state(self) -> str:
+        return self._state[0]
+    
+    @property
+    def failure_count(self) -> int:
+        return self._state[1]
+    
+    def record_failure(self):
+        """Count one upstream failure, opening the breaker at the threshold"""
+        state, failure_count, open_until_ns = self._state
+        failure_count += 1
+        
+        if failure_count < self.threshold:
+            self._state = (state, failure_count, open_until_ns)
+            return
+        
+        self._state = ("OPEN", failure_count, time.monotonic_ns() + self.timeout_ns)
+        if state != "OPEN":
+            CIRCUIT_BREAKER_OPENS.labels(service=self.name).inc()
+            logger.warning("Circuit breaker opened",
+                         service=self.name,
+                         failure_count=failure_count)
     
     async def call(self, func, *args, **kwargs):
         """Execute function with circuit breaker protection"""
-        if self.state == "OPEN":
-            if datetime.utcnow().timestamp() - self.last_failure_time > self.timeout:
-                self.state = "HALF_OPEN"
-            else:
+        state, failure_count, open_until_ns = self._state
+        if state == "OPEN":
+            if time.monotonic_ns() < open_until_ns:
                 raise HTTPException(status_code=503, detail="Service temporarily unavailable")
+            self._state = ("HALF_OPEN", failure_count, 0)
         
         try:
             result = await func(*args, **kwargs)
-            if self.state == "HALF_OPEN":
-                self.state = "CLOSED"
-                self.failure_count = 0
-            return result
-        except Exception as e:
-            self.failure_count += 1
-            self.last_failure_time = datetime.utcnow().timestamp()
-            
-            if self.failure_count >= self.threshold:
-                self.state = "OPEN"
-                CIRCUIT_BREAKER_OPENS.labels(service=kwargs.get('service_name', 'unknown')).inc()
-                logger.warning("Circuit breaker opened", 
-                             service=kwargs.get('service_name', 'unknown'),
-                             failure_count=self.failure_count)
-            
-            raise e
+        except Exception:
+            self.record_failure()
+            raise
+        
+        if self._state[0] == "HALF_OPEN":
+            self._state = ("CLOSED", 0, 0)
+        return result
+
+class ServiceName(str, Enum):
+    """Backend services reachable through the gateway"""
+    DATA_PROCESSOR = "data-processor"
+    ANALYTICS_ENGINE = "analytics-engine"
+
+class ServiceEntry:
+    """A backend's configuration and circuit breaker, resolved once at startup"""
+    
+    __slots__ = ("config", "circuit_breaker", "url_prefix")
+    
+    def __init__(self, config: ServiceConfig):
+        self.config = config
+        self.circuit_breaker = CircuitBreaker(config.name, threshold=config.circuit_breaker_threshold)
+        self.url_prefix = config.url.rstrip("/")
 
 class ServiceRegistry:
     """Service registry for backend services"""
     
     def __init__(self):
-        self.services = {
-            "data-processor": ServiceConfig(
-                name="data-processor",
+        self.services: Dict[str, ServiceEntry] = {
+            ServiceName.DATA_PROCESSOR: ServiceEntry(ServiceConfig(
+                name=ServiceName.DATA_PROCESSOR.value,
                 url=os.getenv("DATA_PROCESSOR_URL", "http://data-processor-service"),
                 timeout=60,
                 retry_count=2
-            ),
-            "analytics-engine": ServiceConfig(
-                name="analytics-engine", 
+            )),
+            ServiceName.ANALYTICS_ENGINE: ServiceEntry(ServiceConfig(
+                name=ServiceName.ANALYTICS_ENGINE.value,
                 url=os.getenv("ANALYTICS_ENGINE_URL", "http://analytics-engine-service"),
                 timeout=30,
                 retry_count=3
-            )
-        }
-        self.circuit_breakers = {
-            name: CircuitBreaker(threshold=config.circuit_breaker_threshold)
-            for name, config in self.services.items()
+            ))
         }
     
-    def get_service(self, name: str) -> Optional[ServiceConfig]:
-        """Get service configuration"""
+    def get(self, name: str) -> Optional[ServiceEntry]:
+        """Get a service's configuration and circuit breaker in one lookup"""
         return self.services.get(name)
+
+# Request headers forwarded to backend services; everything else (hop-by-hop,
+# host, content-length, cookies) is dropped
+FORWARDED_HEADERS = ("authorization", "content-type", "accept", "accept-encoding", "user-agent",
+                     "x-forwarded-for", "idempotency-key")
+
+# Failures worth retrying: the backend was reached but the exchange broke off.
+# Anything else (refused connection, DNS failure) fails fast to the breaker.
+RETRYABLE_ERRORS = (httpx.ReadTimeout, httpx.RemoteProtocolError)
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "PUT", "DELETE"))
+
+# Upload bodies up to this size are buffered so failed attempts can be retried;
+# larger or unsized bodies are streamed through to the backend
+BUFFERED_BODY_LIMIT = int(os.getenv("BUFFERED_BODY_LIMIT", str(1024 * 1024)))
+
+# Response headers that describe the gateway-to-backend connection itself
+HOP_BY_HOP_HEADERS = frozenset(("connection", "keep-alive", "transfer-encoding"))
+
+class RateLimitShield:
+    """
+    Process-local memo of clients that are currently over a rate limit
+    
+    Once the shared limiter rejects a client for an endpoint, further
+    requests are answered locally until the limit refills, so a flooding
+    client stops costing a Redis round trip per request.
+    """
+    
+    def __init__(self, maxsize: int = 100_000, max_block_seconds: float = 60.0):
+        self._blocked_until = TTLCache(maxsize=maxsize, ttl=max_block_seconds)
+    
+    def blocked_endpoint(self, client_ip: str, path: str) -> Optional[str]:
+        """Route template the client is blocked on for this path, if still blocked"""
+        entry = self._blocked_until.get((client_ip, path))
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1]
+        return None
     
-    def get_circuit_breaker(self, name: str) -> Optional[CircuitBreaker]:
-        """Get circuit breaker for service"""
-        return self.circuit_breakers.get(name)
+    def block(self, client_ip: str, path: str, seconds: float, endpoint: str):
+        self._blocked_until[(client_ip, path)] = (time.monotonic() + seconds, endpoint)
+
+# Queued by AuditLogWriter.stop() to end the writer after a final flush
+_STOP_WRITER = object()
+
+class AuditLogWriter:
+    """
+    Batched audit log writer
+    
+    Request handlers enqueue records without blocking; a single task drains
+    the queue and writes each batch to stdout as JSON lines in one call.
+    """
+    
+    def __init__(self, maxsize: int = 10_000, batch_size: int = 256, flush_interval: float = 0.05):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Create the queue and writer task on the running loop"""
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the writer task once it has written everything queued before the call"""
+        if self._task is None:
+            return
+        # The sentinel queues behind every pending record, so the writer sees
+        # (and writes) all of them, including its in-progress batch, first
+        await self.queue.put(_STOP_WRITER)
+        await self._task
+        self._task = None
+        self.queue = None
+    
+    def submit(self, record: Dict[str, Any]):
+        """Enqueue an audit record; dropped (and counted) if the queue is full"""
+        if self.queue is None:
+            AUDIT_RECORDS_DROPPED.inc()
+            return
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            AUDIT_RECORDS_DROPPED.inc()
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = loop.time() + self.flush_interval
+            record = await self.queue.get()
+            while True:
+                if record is _STOP_WRITER:
+                    stopping = True
+                    break
+                batch.append(record)
+                timeout = deadline - loop.time()
+                if len(batch) >= self.batch_size or timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if batch:
+                self._write(batch)
+    
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            sys.stdout.buffer.write(b"".join(orjson.dumps(record) + b"\n" for record in batch))
+            sys.stdout.buffer.flush()
+        except Exception as e:
+            logger.error("Failed to write audit records", error=str(e), count=len(batch))
 
 class APIGateway:
     """Main API Gateway class"""
@@ -178,9 +407,22 @@ class APIGateway:
     def __init__(self):
         self.security = SecurityManager()
         self.service_registry = ServiceRegistry()
-        self.http_client = httpx.AsyncClient(
-            timeout=httpx.Timeout(30.0),
-            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        # Created per worker on the running loop by the app lifespan
+        self.http_client: Optional[httpx.AsyncClient] = None
+    
+    @staticmethod
+    def create_http_client() -> httpx.AsyncClient:
+        """Build the shared upstream client"""
+        # HTTP/2 multiplexes concurrent proxied calls over one connection per
+        # backend (negotiated via ALPN on TLS upstreams; plain http stays 1.1)
+        return httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(
+                max_keepalive_connections=100,
+                max_connections=500,
+                keepalive_expiry=30.0
+            )
         )
     
     async def proxy_request(
@@ -188,31 +430,45 @@ class APIGateway:
         service_name: str,
         path: str,
         method: str,
-        headers: Dict[str, str],
-        body: Optional[bytes] = None,
+        request: Request,
+        body: Optional[Union[bytes, AsyncIterator[bytes]]] = None,
         query_params: Optional[Dict[str, str]] = None
     ) -> httpx.Response:
-        """Proxy request to backend service with circuit breaker"""
-        service_config = self.service_registry.get_service(service_name)
-        if not service_config:
+        """
+        Proxy request to backend service with circuit breaker
+        
+        The response is returned unread (streaming); pass it to
+        passthrough_response, which relays and closes it.
+        """
+        service = self.service_registry.get(service_name)
+        if service is None:
             raise HTTPException(status_code=404, detail=f"Service {service_name} not found")
         
-        circuit_breaker = self.service_registry.get_circuit_breaker(service_name)
+        service_config = service.config
+        circuit_breaker = service.circuit_breaker
+        http_client = request.app.state.http_client
         
         async def make_request():
-            url = f"{service_config.url}{path}"
+            url = f"{service.url_prefix}{path}"
             
             # Prepare headers
-            proxy_headers = {k: v for k, v in headers.items() 
-                           if k.lower() not in ['host', 'content-length']}
-            proxy_headers['X-Forwarded-For'] = headers.get('X-Forwarded-For', '')
-            proxy_headers['X-Request-ID'] = self.security.generate_request_id()
+            request_headers = request.headers
+            proxy_headers = {name: value for name in FORWARDED_HEADERS
+                             if (value := request_headers.get(name))}
+            # Responses are relayed with their content-encoding intact, so the
+            # backend may only compress what the client said it accepts
+            proxy_headers.setdefault('accept-encoding', 'identity')
+            proxy_headers['x-request-id'] = self.security.generate_request_id()
             
-            # Make request with retries
+            # Retry only requests that are safe to repeat: idempotent methods or
+            # callers supplying an Idempotency-Key, and never a streamed upload
+            replayable = body is None or isinstance(body, bytes)
+            idempotent = method in IDEMPOTENT_METHODS or 'idempotency-key' in proxy_headers
+            attempts = service_config.retry_count if replayable and idempotent else 1
             last_exception = None
-            for attempt in range(service_config.retry_count):
+            for attempt in range(attempts):
                 try:
-                    response = await self.http_client.request(
+                    upstream_request = http_client.build_request(
                         method=method,
                         url=url,
                         headers=proxy_headers,
@@ -220,21 +476,67 @@ class APIGateway:
                         params=query_params,
                         timeout=service_config.timeout
                     )
-                    return response
+                    return await http_client.send(upstream_request, stream=True)
                 except httpx.RequestError as e:
                     last_exception = e
                     logger.warning(f"Request attempt {attempt + 1} failed",
                                  service=service_name,
                                  error=str(e))
-                    if attempt < service_config.retry_count - 1:
-                        await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                    if not isinstance(e, RETRYABLE_ERRORS) or attempt == attempts - 1:
+                        break
+                    # Every failed attempt counts towards opening the breaker;
+                    # the final one is counted by the breaker itself
+                    circuit_breaker.record_failure()
+                    # Full jitter keeps gateway workers from retrying in lockstep
+                    await asyncio.sleep(random.uniform(0, 2 ** attempt * 0.1))
             
             raise last_exception
         
-        return await circuit_breaker.call(make_request, service_name=service_name)
+        return await circuit_breaker.call(make_request)
+
+# Initialize rate limiter; counters live in Redis so limits hold across workers
+# slowapi checks limits through the synchronous `limits` Redis storage, so each
+# check is a blocking round trip on the event loop: keep it short, and fall back
+# to per-process in-memory limits while Redis is unreachable
+RATE_LIMIT_REDIS_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.1"))
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", os.getenv("REDIS_URL", "redis://redis:6379/0")),
+    storage_options={
+        "max_connections": 50,
+        "socket_timeout": RATE_LIMIT_REDIS_TIMEOUT,
+        "socket_connect_timeout": RATE_LIMIT_REDIS_TIMEOUT
+    },
+    strategy="moving-window",
+    in_memory_fallback_enabled=True
+)
+
+# The token cache sits on every authenticated request; an unresponsive Redis
+# must cost at most this long before the token is validated in full instead
+TOKEN_CACHE_REDIS_TIMEOUT = float(os.getenv("TOKEN_CACHE_REDIS_TIMEOUT", "0.1"))
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the upstream client on the worker's loop and close it on shutdown"""
+    app.state.http_client = gateway.http_client = APIGateway.create_http_client()
+    gateway.security.token_cache = aioredis.from_url(
+        os.getenv("REDIS_URL", "redis://redis:6379/0"),
+        decode_responses=False,
+        socket_timeout=TOKEN_CACHE_REDIS_TIMEOUT,
+        socket_connect_timeout=TOKEN_CACHE_REDIS_TIMEOUT
+    )
+    app.state.audit_writer = audit_writer
+    audit_writer.start()
+    prefetch = [name for name in os.getenv("PREFETCH_SECRETS", "").split(",") if name]
+    await gateway.security.prefetch_secrets(prefetch)
+    yield
+    await audit_writer.stop()
+    await app.state.http_client.aclose()
+    gateway.http_client = None
+    await gateway.security.token_cache.aclose()
+    gateway.security.token_cache = None
+
+audit_writer = AuditLogWriter()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -242,32 +544,40 @@ app = FastAPI(
     description="HIPAA-compliant API Gateway for Healthcare Analytics Platform",
     version="1.0.0",
     docs_url="/docs" if os.getenv("ENVIRONMENT") != "prod" else None,
-    redoc_url="/redoc" if os.getenv("ENVIRONMENT") != "prod" else None
+    redoc_url="/redoc" if os.getenv("ENVIRONMENT") != "prod" else None,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add rate limiting
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+rate_limit_shield = RateLimitShield()
+
+def endpoint_label(request: Request) -> str:
+    """
+    Metrics label for the matched route template (e.g. /data/status/{job_id})
+    
+    Raw paths would mint a new time series per job ID; unrouted requests
+    share a single label.
+    """
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    """Reject the request and shield the limiter until one slot refills"""
+    item = exc.limit.limit
+    endpoint = endpoint_label(request)
+    rate_limit_shield.block(get_remote_address(request), request.url.path,
+                            item.get_expiry() / item.amount, endpoint)
+    RATE_LIMIT_HITS.labels(endpoint=endpoint).inc()
+    return _rate_limit_exceeded_handler(request, exc)
+
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
 # Security
 security = HTTPBearer()
 gateway = APIGateway()
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=os.getenv("ALLOWED_ORIGINS", "https://healthcare-platform.com").split(","),
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE"],
-    allow_headers=["*"],
-)
-
-# Trusted hosts
-app.add_middleware(
-    TrustedHostMiddleware,
-    allowed_hosts=os.getenv("ALLOWED_HOSTS", "api.healthcare-platform.com").split(",")
-)
-
 # Configure Azure Monitor
 if os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING"):
     configure_azure_monitor()
@@ -281,53 +591,83 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(
     token = credentials.credentials
     return await gateway.security.validate_token(token)
 
+# Static security headers, pre-encoded once and appended to every response
+SECURITY_HEADERS = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+)
+
+def add_security_headers(response: Response, request_id: str):
+    """Append the security headers and request ID to a response"""
+    response.raw_headers.extend(SECURITY_HEADERS)
+    response.raw_headers.append((b"x-request-id", request_id.encode("latin-1")))
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log all requests for audit trail"""
-    start_time = datetime.utcnow()
+    start_time = time.monotonic_ns()
     request_id = gateway.security.generate_request_id()
     
     # Add request ID to headers for downstream services
     request.state.request_id = request_id
     
-    # Log request
-    logger.info("Gateway request received",
-               request_id=request_id,
-               method=request.method,
-               url=str(request.url),
-               client_ip=request.client.host,
-               user_agent=request.headers.get("user-agent"))
+    # Log request; the bound context is built once and shared by both events
+    request_logger = logger.bind(request_id=request_id,
+                                 method=request.method,
+                                 url=str(request.url))
+    request_logger.info("Gateway request received",
+                        client_ip=request.client.host,
+                        user_agent=request.headers.get("user-agent"))
     
-    response = await call_next(request)
+    # Clients already over a limit are rejected here without a limiter round
+    # trip, but still logged and counted like any other response
+    blocked_endpoint = rate_limit_shield.blocked_endpoint(get_remote_address(request), request.url.path)
+    if blocked_endpoint is None:
+        response = await call_next(request)
+        endpoint = endpoint_label(request)
+    else:
+        RATE_LIMIT_HITS.labels(endpoint=blocked_endpoint).inc()
+        response = ORJSONResponse({"error": "Rate limit exceeded"}, status_code=429)
+        endpoint = blocked_endpoint
     
     # Log response
-    duration = (datetime.utcnow() - start_time).total_seconds()
-    logger.info("Gateway request completed",
-               request_id=request_id,
-               method=request.method,
-               url=str(request.url),
-               status_code=response.status_code,
-               duration=duration)
+    duration = (time.monotonic_ns() - start_time) / 1e9
+    request_logger.info("Gateway request completed",
+                        status_code=response.status_code,
+                        duration=duration)
     
     # Record metrics
-    service_name = request.url.path.split('/')[1] if len(request.url.path.split('/')) > 1 else 'unknown'
+    # First path segment, e.g. "data" or "analytics"
+    service_name = request.scope["path"][1:].partition('/')[0] or 'unknown'
     REQUESTS_TOTAL.labels(
         method=request.method,
-        endpoint=request.url.path,
-        status=response.status_code,
+        endpoint=endpoint,
+        status=f"{response.status_code // 100}xx",
         service=service_name
     ).inc()
     REQUEST_DURATION.labels(service=service_name).observe(duration)
     
-    # Add security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    response.headers["X-Request-ID"] = request_id
-    
+    add_security_headers(response, request_id)
     return response
 
+# Configure CORS; registered after log_requests so it wraps it and the
+# shield's 429s carry CORS headers too
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=os.getenv("ALLOWED_ORIGINS", "https://healthcare-platform.com").split(","),
+    allow_credentials=True,
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
+    allow_headers=["*"],
+)
+
+# Trusted hosts, outermost so other hosts are refused before any work
+app.add_middleware(
+    TrustedHostMiddleware,
+    allowed_hosts=os.getenv("ALLOWED_HOSTS", "api.healthcare-platform.com").split(",")
+)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -336,7 +676,12 @@ async def health_check():
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint"""
-    return generate_latest()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Aggregate the mmap-backed samples of every worker process
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/services")
 async def get_services(user: Dict[str, Any] = Depends(get_current_user)):
@@ -356,124 +701,79 @@ async def get_services(user: Dict[str, Any] = Depends(get_current_user)):
         ]
     }
 
-# Data Processing Service Proxy
-@app.post("/data/process")
-@limiter.limit("10/minute")
-async def proxy_data_process(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    user: Dict[str, Any] = Depends(get_current_user)
-):
-    """Proxy to data processing service"""
-    try:
-        body = await request.body()
-        response = await gateway.proxy_request(
-            service_name="data-processor",
-            path="/data/process",
-            method="POST",
-            headers=dict(request.headers),
-            body=body
-        )
-        
-        # Background audit logging
-        background_tasks.add_task(
-            log_service_call,
-            service="data-processor",
-            endpoint="/data/process",
-            user_id=user.get('user_id'),
-            status_code=response.status_code
-        )
-        
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code
-        )
-    except httpx.RequestError as e:
-        logger.error("Data processor service error", error=str(e))
-        raise HTTPException(status_code=503, detail="Data processing service unavailable")
-
-@app.get("/data/status/{job_id}")
-@limiter.limit("30/minute")
-async def proxy_data_status(
-    job_id: str,
-    request: Request,
-    user: Dict[str, Any] = Depends(get_current_user)
-):
-    """Proxy to data processing status endpoint"""
-    try:
-        response = await gateway.proxy_request(
-            service_name="data-processor",
-            path=f"/data/status/{job_id}",
-            method="GET",
-            headers=dict(request.headers)
-        )
-        
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code
-        )
-    except httpx.RequestError as e:
-        logger.error("Data processor service error", error=str(e))
-        raise HTTPException(status_code=503, detail="Data processing service unavailable")
-
-# Analytics Engine Service Proxy
-@app.post("/analytics/query")
-@limiter.limit("20/minute")
-async def proxy_analytics_query(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    user: Dict[str, Any] = Depends(get_current_user)
-):
-    """Proxy to analytics engine"""
-    try:
-        body = await request.body()
-        response = await gateway.proxy_request(
-            service_name="analytics-engine",
-            path="/analytics/query",
-            method="POST",
-            headers=dict(request.headers),
-            body=body
-        )
-        
-        # Background audit logging
-        background_tasks.add_task(
-            log_service_call,
-            service="analytics-engine",
-            endpoint="/analytics/query",
-            user_id=user.get('user_id'),
-            status_code=response.status_code
-        )
-        
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code
-        )
-    except httpx.RequestError as e:
-        logger.error("Analytics engine service error", error=str(e))
-        raise HTTPException(status_code=503, detail="Analytics engine service unavailable")
+class ProxyRoute(NamedTuple):
+    """A gateway route forwarded unchanged to the same path on a backend service"""
+    name: str
+    path: str
+    method: str
+    service: ServiceName
+    rate_limit: str
+    audit: bool
+    summary: str
+    unavailable_detail: str
+    status_key: Optional[str] = None  # name reported by /rate-limit/status
 
-@app.get("/analytics/types")
-@limiter.limit("100/minute")
-async def proxy_analytics_types(
-    request: Request,
-    user: Dict[str, Any] = Depends(get_current_user)
-):
-    """Proxy to analytics types endpoint"""
-    try:
-        response = await gateway.proxy_request(
-            service_name="analytics-engine",
-            path="/analytics/types",
-            method="GET",
-            headers=dict(request.headers)
-        )
-        
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code
-        )
-    except httpx.RequestError as e:
-        logger.error("Analytics engine service error", error=str(e))
-        raise HTTPException(status_code=503, detail="Analytics engine service unavailable")
+PROXY_ROUTES = (
+    # Data Processing Service Proxy
+    ProxyRoute("proxy_data_process", "/data/process", "POST", ServiceName.DATA_PROCESSOR,
+               "10/minute", True, "Proxy to data processing service",
+               "Data processing service unavailable", "data_processing"),
+    ProxyRoute("proxy_data_status", "/data/status/{job_id}", "GET", ServiceName.DATA_PROCESSOR,
+               "30/minute", False, "Proxy to data processing status endpoint",
+               "Data processing service unavailable"),
+    # Analytics Engine Service Proxy
+    ProxyRoute("proxy_analytics_query", "/analytics/query", "POST", ServiceName.ANALYTICS_ENGINE,
+               "20/minute", True, "Proxy to analytics engine",
+               "Analytics engine service unavailable", "analytics_query"),
+    ProxyRoute("proxy_analytics_types", "/analytics/types", "GET", ServiceName.ANALYTICS_ENGINE,
+               "100/minute", False, "Proxy to analytics types endpoint",
+               "Analytics engine service unavailable", "analytics_types"),
+)
+
+def make_proxy_handler(route: ProxyRoute):
+    """Build the rate-limited endpoint forwarding one ProxyRoute"""
+    has_body = route.method in ("POST", "PUT")
+    
+    async def proxy_handler(
+        request: Request,
+        user: Dict[str, Any] = Depends(get_current_user)
+    ):
+        try:
+            body = await request_content(request) if has_body else None
+            response = await gateway.proxy_request(
+                service_name=route.service,
+                path=request.scope["path"],
+                method=route.method,
+                request=request,
+                body=body
+            )
+            
+            if route.audit:
+                # Audit logging, written in batches off the request path
+                log_service_call(
+                    service=route.service.value,
+                    endpoint=route.path,
+                    user_id=user.get('user_id'),
+                    status_code=response.status_code
+                )
+            
+            return passthrough_response(response)
+        except httpx.RequestError as e:
+            logger.error("Backend service error", service=route.service.value, error=str(e))
+            raise HTTPException(status_code=503, detail=route.unavailable_detail)
+    
+    # slowapi keys limits by function name, so each route needs its own
+    proxy_handler.__name__ = proxy_handler.__qualname__ = route.name
+    proxy_handler.__doc__ = route.summary
+    return limiter.limit(route.rate_limit)(proxy_handler)
+
+for proxy_route in PROXY_ROUTES:
+    app.add_api_route(
+        proxy_route.path,
+        make_proxy_handler(proxy_route),
+        methods=[proxy_route.method],
+        name=proxy_route.name
+    )
 
 # Rate limiting status endpoint
 @app.get("/rate-limit/status")
@@ -486,34 +786,72 @@ async def rate_limit_status(
     return {
         "client_ip": gateway.security.hash_sensitive_data(client_ip),
         "rate_limits": {
-            "data_processing": "10/minute",
-            "analytics_query": "20/minute", 
-            "analytics_types": "100/minute"
+            route.status_key: route.rate_limit
+            for route in PROXY_ROUTES if route.status_key
         }
     }
 
-async def log_service_call(service: str, endpoint: str, user_id: str, status_code: int):
-    """Background task for audit logging"""
+async def request_content(request: Request) -> Union[bytes, AsyncIterator[bytes]]:
+    """Buffer small upload bodies (retryable); stream large or unsized ones"""
+    try:
+        content_length = int(request.headers["content-length"])
+    except (KeyError, ValueError):
+        # Unsized or malformed: stream it and let the backend judge the body
+        return request.stream()
+    if content_length <= BUFFERED_BODY_LIMIT:
+        return await request.body()
+    return request.stream()
+
+async def _relay_body(response: httpx.Response) -> AsyncIterator[bytes]:
     try:
-        logger.info("Service call audit",
-                   service=service,
-                   endpoint=endpoint,
-                   user_id=gateway.security.hash_sensitive_data(user_id),
-                   status_code=status_code,
-                   audit=True)
-    except Exception as e:
-        logger.error("Failed to log service call audit", error=str(e))
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    await gateway.http_client.aclose()
+        async for chunk in response.aiter_raw():
+            yield chunk
+    finally:
+        await response.aclose()
+
+def passthrough_response(response: httpx.Response) -> StreamingResponse:
+    """Stream a backend response through verbatim, without a JSON round trip"""
+    relayed = StreamingResponse(_relay_body(response), status_code=response.status_code)
+    # Raw header pairs keep repeated headers such as Set-Cookie
+    relayed.raw_headers = [
+        (name.encode("latin-1"), value.encode("latin-1"))
+        for name, value in response.headers.multi_items()
+        if name not in HOP_BY_HOP_HEADERS
+    ]
+    return relayed
+
+def log_service_call(service: str, endpoint: str, user_id: str, status_code: int):
+    """Queue a service call audit record for the batched writer"""
+    audit_writer.submit({
+        "event": "Service call audit",
+        "level": "info",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "service": service,
+        "endpoint": endpoint,
+        "user_id": gateway.security.hash_sensitive_data(user_id or ""),
+        "status_code": status_code,
+        "audit": True
+    })
 
 if __name__ == "__main__":
+    workers = int(os.getenv("WEB_CONCURRENCY", str((os.cpu_count() or 1) * 2 + 1)))
+    if workers > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        # Workers are spawned fresh and inherit this, so every worker records
+        # into shared files and any one of them can serve the full /metrics
+        multiproc_dir = "/tmp/prometheus-gateway"
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = multiproc_dir
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+        backlog=2048,
+        timeout_keep_alive=30,
         log_level=os.getenv("LOG_LEVEL", "info").lower(),
         access_log=True
     )
@@ -2,20 +2,34 @@
 # Advanced AI-powered clinical decision making and risk assessment
 
 import os
+import io
 import asyncio
+import hashlib
+import re
+import time
 import logging
-import json
-from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from itertools import combinations, count
+from operator import itemgetter
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+import msgpack
+from cachetools import LFUCache, TTLCache
+import orjson
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest, RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
 import joblib
+import onnxruntime as ort
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
 import aiohttp
 import asyncpg
+from azure.core import MatchConditions
 from azure.storage.blob.aio import BlobServiceClient
 from azure.keyvault.secrets import SecretClient
 from azure.identity.aio import DefaultAzureCredential
@@ -50,10 +64,345 @@ logger = structlog.get_logger(__name__)
 # Prometheus metrics
 DECISION_REQUESTS = Counter('cdss_decision_requests_total', 'Total CDSS decision requests', ['decision_type'])
 DECISION_LATENCY = Histogram('cdss_decision_latency_seconds', 'CDSS decision latency')
-RISK_SCORE_GAUGE = Gauge('cdss_risk_score', 'Current risk score', ['patient_id', 'risk_type'])
+RISK_SCORE_GAUGE = Gauge('cdss_risk_score', 'Most recent risk score', ['risk_type'])
 MODEL_ACCURACY = Gauge('cdss_model_accuracy', 'Model accuracy score', ['model_type'])
 
-@dataclass
+# Threshold columns in precedence order: the first bound crossed decides the
+# alert, with its severity and message prefix
+THRESHOLD_BOUNDS = (
+    ('critical_high', 'critical', 'Critical high'),
+    ('critical_low', 'critical', 'Critical low'),
+    ('high', 'high', 'High'),
+    ('low', 'high', 'Low')
+)
+
+def build_threshold_table(thresholds: Dict[str, Dict[str, float]]) -> Tuple[Dict[str, int], np.ndarray]:
+    """Row index per measurement and a (K, 4) array of THRESHOLD_BOUNDS, NaN where unset"""
+    index = {name: row for row, name in enumerate(thresholds)}
+    edges = np.array([
+        [bounds.get(bound, np.nan) for bound, _, _ in THRESHOLD_BOUNDS]
+        for bounds in thresholds.values()
+    ], dtype=np.float64)
+    return index, edges
+
+def classify_thresholds(readings: Dict[str, float],
+                        table: Tuple[Dict[str, int], np.ndarray]) -> List[Tuple[str, float, int]]:
+    """(name, value, bound) for each reading that crosses a threshold, in reading order"""
+    index, edges = table
+    names = [name for name in readings if name in index]
+    if not names:
+        return []
+    
+    values = np.array([readings[name] for name in names], dtype=np.float64)
+    rows = edges[[index[name] for name in names]]
+    # NaN (unset) bounds compare False, so they never fire
+    crossed = np.column_stack((
+        values >= rows[:, 0],
+        values <= rows[:, 1],
+        values >= rows[:, 2],
+        values <= rows[:, 3]
+    ))
+    first_crossed = crossed.argmax(axis=1)
+    return [(names[i], readings[names[i]], int(first_crossed[i])) for i in np.flatnonzero(crossed.any(axis=1))]
+
+def classify_thresholds_batch(values: np.ndarray,
+                              table: Tuple[Dict[str, int], np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(patient, measurement, bound) index arrays for each reading of an (N, K) matrix that crosses a threshold"""
+    # Compare at the readings' precision so a reading equal to a bound still fires
+    edges = table[1].astype(values.dtype, copy=False)
+    # NaN readings and unset bounds compare False, so they never fire
+    crossed = np.stack((
+        values >= edges[:, 0],
+        values <= edges[:, 1],
+        values >= edges[:, 2],
+        values <= edges[:, 3]
+    ), axis=-1)
+    patients, measurements = np.nonzero(crossed.any(axis=-1))
+    return patients, measurements, crossed[patients, measurements].argmax(axis=1)
+
+# Recommended actions per alerting measurement; anything unlisted goes
+# straight to the physician
+DEFAULT_ALERT_ACTIONS = ("Notify physician immediately",)
+VITAL_SIGN_ACTIONS = {
+    'systolic_bp': (
+        "Repeat blood pressure measurement",
+        "Assess for hypertensive emergency",
+        "Consider antihypertensive therapy"
+    ),
+    'heart_rate': (
+        "Obtain 12-lead ECG",
+        "Assess hemodynamic stability",
+        "Consider cardiac monitoring"
+    ),
+    'temperature': (
+        "Investigate infection source",
+        "Consider blood cultures",
+        "Implement fever management"
+    ),
+    'oxygen_saturation': (
+        "Administer supplemental oxygen",
+        "Assess respiratory status",
+        "Consider arterial blood gas"
+    )
+}
+LAB_VALUE_ACTIONS = {
+    'glucose': (
+        "Check point-of-care glucose",
+        "Assess for diabetic emergency",
+        "Review insulin/diabetes medications"
+    ),
+    'creatinine': (
+        "Assess kidney function",
+        "Review nephrotoxic medications",
+        "Consider nephrology consultation"
+    ),
+    'hemoglobin': (
+        "Assess for bleeding",
+        "Consider transfusion if indicated",
+        "Investigate cause of anemia"
+    )
+}
+
+# High-risk drug combinations (simplified for demo)
+HIGH_RISK_COMBINATIONS = {
+    ('warfarin', 'aspirin'): 0.8,
+    ('digoxin', 'quinidine'): 0.9,
+    ('phenytoin', 'warfarin'): 0.7,
+    ('metformin', 'contrast_dye'): 0.6
+}
+# Risk of any other pair of medications
+BASELINE_INTERACTION_RISK = 0.1
+
+DRUG_RISK_CACHE_SIZE = 4096
+
+# Interacting medications as small ints, and pair risks keyed by lo * N + hi
+INTERACTION_MED_IDS = {
+    name: med_id for med_id, name in enumerate(sorted({med for pair in HIGH_RISK_COMBINATIONS for med in pair}))
+}
+_MED_COUNT = len(INTERACTION_MED_IDS)
+INTERACTION_PAIR_RISK = {
+    min(INTERACTION_MED_IDS[a], INTERACTION_MED_IDS[b]) * _MED_COUNT
+    + max(INTERACTION_MED_IDS[a], INTERACTION_MED_IDS[b]): risk
+    for (a, b), risk in HIGH_RISK_COMBINATIONS.items()
+}
+
+# Local copies of model blobs (keyed by ETag) and their compiled ONNX graphs
+# (keyed by content hash), so warm restarts skip the download and compile
+MODEL_CACHE_DIR = os.getenv('CDSS_MODEL_CACHE_DIR', '/tmp/cdss-models')
+
+# A compiled graph is only served if it reproduces the sklearn probabilities
+# on a probe batch; float32 split thresholds can route rows near a split
+# differently, in which case the model stays on sklearn
+ONNX_PARITY_PROBE_ROWS = 256
+ONNX_PARITY_TOLERANCE = 1e-4
+
+# Decision cache entries live for an hour in Redis and five minutes in the
+# in-process L1; Redis lookups give up after a few milliseconds
+DECISION_CACHE_TTL = 3600
+DECISION_L1_TTL = 300
+DECISION_L1_SIZE = 10_000
+DECISION_CACHE_TIMEOUT = float(os.getenv('CDSS_CACHE_TIMEOUT_MS', '5')) / 1000
+
+# clinical_decisions columns, in ClinicalDecision field order
+DECISION_COLUMNS = (
+    'decision_id', 'patient_id', 'decision_type', 'recommendation', 'confidence_score',
+    'risk_level', 'supporting_evidence', 'contraindications', 'alternative_options',
+    'follow_up_required', 'urgency_level', 'created_at', 'expires_at'
+)
+
+# clinical_alerts columns, in AlertCondition field order
+ALERT_COLUMNS = (
+    'alert_id', 'patient_id', 'alert_type', 'severity', 'message', 'triggered_by',
+    'conditions_met', 'recommended_actions', 'auto_resolved', 'timestamp'
+)
+INSERT_ALERT_QUERY = (
+    f"INSERT INTO clinical_alerts ({', '.join(ALERT_COLUMNS)}) "
+    f"VALUES ({', '.join(f'${position}' for position in range(1, len(ALERT_COLUMNS) + 1))})"
+)
+# Alert batches larger than this are written with COPY
+ALERT_COPY_THRESHOLD = 100
+
+# Model input features. Missing vital signs and lab results take the
+# listed default
+BASE_FEATURES = ('age', 'is_male', 'history_count', 'medication_count', 'comorbidity_count')
+VITAL_SIGN_FEATURES = (
+    ('systolic_bp', 120.0),
+    ('diastolic_bp', 80.0),
+    ('heart_rate', 70.0),
+    ('temperature', 37.0),
+    ('oxygen_saturation', 98.0),
+    ('respiratory_rate', 16.0)
+)
+LAB_RESULT_FEATURES = (
+    ('glucose', 100.0),
+    ('creatinine', 1.0),
+    ('hemoglobin', 14.0),
+    ('white_blood_cells', 7000.0),
+    ('platelet_count', 250000.0)
+)
+
+# One feature matrix column per name; the base, vital sign and lab result
+# blocks are contiguous so each fills with a single slice assignment
+FEATURE_COLUMNS = (
+    BASE_FEATURES
+    + tuple(name for name, _ in VITAL_SIGN_FEATURES)
+    + tuple(name for name, _ in LAB_RESULT_FEATURES)
+)
+_BASE_BLOCK = slice(0, len(BASE_FEATURES))
+_VITAL_SIGN_BLOCK = slice(_BASE_BLOCK.stop, _BASE_BLOCK.stop + len(VITAL_SIGN_FEATURES))
+_LAB_RESULT_BLOCK = slice(_VITAL_SIGN_BLOCK.stop, len(FEATURE_COLUMNS))
+
+def _feature_selector(names: Tuple[str, ...]):
+    """Column slice for a run of adjacent features (a view), else an index array"""
+    columns = [FEATURE_COLUMNS.index(name) for name in names]
+    if columns == list(range(columns[0], columns[0] + len(columns))):
+        return slice(columns[0], columns[0] + len(columns))
+    return np.array(columns)
+
+# Risk score name -> its model's input columns in the feature matrix
+RISK_FEATURES = {
+    'sepsis': _feature_selector(FEATURE_COLUMNS),
+    'readmission': _feature_selector(BASE_FEATURES + ('history_count',)),
+    'fall': _feature_selector(FEATURE_COLUMNS[:_VITAL_SIGN_BLOCK.start + 3]),  # BP and HR most relevant
+    'mortality': _feature_selector(FEATURE_COLUMNS)
+}
+
+# Rule-based gates in front of the risk models
+SEPSIS_VITAL_SIGNS = frozenset({'heart_rate', 'temperature', 'respiratory_rate'})
+READMISSION_HISTORY_GATE = 2  # prior conditions
+FALL_AGE_GATE = 65
+
+# Risk score name -> model (and scaler) name, in scoring order; the risk
+# name also selects the feature columns from RISK_FEATURES
+RISK_MODELS = (
+    ('sepsis', 'sepsis_prediction'),
+    ('readmission', 'readmission_risk'),
+    ('fall', 'fall_risk'),
+    ('mortality', 'mortality_prediction')
+)
+
+# Every risk score a decision can carry
+RISK_SCORE_KEYS = tuple(risk for risk, _ in RISK_MODELS) + ('drug_interaction',)
+
+# Triage levels: a score strictly above the n-th bound reaches level n + 1
+URGENCY_BOUNDS = np.array([0.4, 0.6, 0.8])
+URGENCY_LEVELS = ('routine', 'priority', 'urgent', 'critical')
+RISK_LEVEL_BOUNDS = np.array([0.4, 0.7])
+RISK_LEVELS = ('low', 'moderate', 'high')
+FOLLOW_UP_THRESHOLD = 0.5
+
+def triage_risk_scores(all_risk_scores: List[Dict[str, float]]) -> List[Tuple[str, str, bool]]:
+    """(urgency level, overall risk level, follow-up required) for each patient's risk scores"""
+    risk_matrix = np.array(
+        [[risk_scores.get(key, np.nan) for key in RISK_SCORE_KEYS] for risk_scores in all_risk_scores],
+        dtype=np.float64
+    ).reshape(len(all_risk_scores), len(RISK_SCORE_KEYS))
+    # Urgency and follow-up key off the highest score present, the risk level
+    # off their mean; a patient with no scores is routine and low
+    present = ~np.isnan(risk_matrix)
+    max_risks = np.where(present, risk_matrix, -np.inf).max(axis=1)
+    avg_risks = np.where(present, risk_matrix, 0.0).sum(axis=1) / np.maximum(present.sum(axis=1), 1)
+    
+    urgency_codes = np.searchsorted(URGENCY_BOUNDS, max_risks, side='left')
+    risk_level_codes = np.searchsorted(RISK_LEVEL_BOUNDS, avg_risks, side='left')
+    follow_ups = max_risks > FOLLOW_UP_THRESHOLD
+    return [
+        (URGENCY_LEVELS[urgency], RISK_LEVELS[risk_level], bool(follow_up))
+        for urgency, risk_level, follow_up in zip(urgency_codes, risk_level_codes, follow_ups)
+    ]
+
+# Recommendations and contraindications are pure functions of a few profile
+# fields, so screening cohorts with repeated patterns hit an in-process LRU
+RULE_CACHE_SIZE = 4096
+
+_score_of = itemgetter(1)
+
+# History entries mentioning any of these are contraindications; matched
+# as one compiled alternation so each entry is scanned once
+HIGH_RISK_CONDITIONS = ('renal_failure', 'liver_disease', 'heart_failure')
+HIGH_RISK_CONDITION_PATTERN = re.compile('|'.join(map(re.escape, HIGH_RISK_CONDITIONS)))
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def recommend_for_risk_scores(risk_items: Tuple[Tuple[str, float], ...]) -> Tuple[str, Tuple[str, ...], Tuple[str, ...], float]:
+    """(primary, alternatives, evidence, confidence) recommendation for a patient's (risk, score) pairs"""
+    # Determine primary recommendation based on highest risk
+    if not risk_items:
+        return "Continue standard care monitoring", (), (), 0.5
+    
+    max_risk_type, max_risk_score = max(risk_items, key=_score_of)
+    
+    if max_risk_type == 'sepsis' and max_risk_score > 0.7:
+        return (
+            "Immediate sepsis protocol initiation recommended",
+            (
+                "Broad-spectrum antibiotic therapy",
+                "Fluid resuscitation",
+                "Lactate monitoring"
+            ),
+            (
+                f"Sepsis risk score: {max_risk_score:.2f}",
+                "Elevated vital signs consistent with SIRS criteria"
+            ),
+            max_risk_score
+        )
+    
+    if max_risk_type == 'fall' and max_risk_score > 0.6:
+        return (
+            "Fall prevention measures implementation",
+            (
+                "Bed alarm activation",
+                "Physical therapy consultation",
+                "Medication review for sedating effects"
+            ),
+            (
+                f"Fall risk score: {max_risk_score:.2f}",
+                "Multiple risk factors present"
+            ),
+            max_risk_score
+        )
+    
+    if max_risk_type == 'drug_interaction' and max_risk_score > 0.5:
+        return (
+            "Medication review and adjustment required",
+            (
+                "Pharmacist consultation",
+                "Alternative medication selection",
+                "Enhanced monitoring protocols"
+            ),
+            (
+                f"Drug interaction risk: {max_risk_score:.2f}",
+                "Multiple medications with potential interactions"
+            ),
+            max_risk_score
+        )
+    
+    return "Continue current care plan with routine monitoring", (), (), 1.0 - max_risk_score
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def contraindications_for(elderly: bool, medical_history: Tuple[str, ...],
+                          systolic_bp: float, heart_rate: float) -> Tuple[str, ...]:
+    """Contraindications implied by age, medical history and current vital signs"""
+    contraindications = []
+    
+    # Check age-related contraindications
+    if elderly:
+        contraindications.append("Consider age-adjusted dosing for medications")
+    
+    # Check for specific medical conditions
+    for condition in medical_history:
+        if HIGH_RISK_CONDITION_PATTERN.search(condition.lower()):
+            contraindications.append(f"Contraindication due to {condition}")
+    
+    # Check vital sign abnormalities
+    if systolic_bp > 180:
+        contraindications.append("Severe hypertension - avoid vasoconstrictors")
+    
+    if heart_rate > 120:
+        contraindications.append("Tachycardia - avoid stimulants")
+    
+    return tuple(contraindications)
+
+@dataclass(slots=True)
 class PatientRiskProfile:
     """Patient risk assessment profile"""
     patient_id: str
@@ -67,7 +416,30 @@ class PatientRiskProfile:
     risk_factors: List[str]
     timestamp: datetime
 
-@dataclass
+@dataclass(slots=True)
+class PatientRiskProfileBatch:
+    """Column-oriented view of several patient profiles for batch rule sweeps"""
+    profiles: List[PatientRiskProfile]
+    patient_ids: np.ndarray
+    vital_array: np.ndarray  # (N, len(vital_keys)) float32, NaN where missing
+    lab_array: np.ndarray  # (N, len(lab_keys)) float32, NaN where missing
+    
+    @classmethod
+    def from_profiles(cls, profiles: List[PatientRiskProfile],
+                      vital_keys: List[str], lab_keys: List[str]) -> 'PatientRiskProfileBatch':
+        """Convert profiles once at the batch boundary, filling each measurement column in turn"""
+        vital_array = np.empty((len(profiles), len(vital_keys)), dtype=np.float32)
+        for column, name in enumerate(vital_keys):
+            vital_array[:, column] = [profile.vital_signs.get(name, np.nan) for profile in profiles]
+        lab_array = np.empty((len(profiles), len(lab_keys)), dtype=np.float32)
+        for column, name in enumerate(lab_keys):
+            lab_array[:, column] = [profile.lab_results.get(name, np.nan) for profile in profiles]
+        
+        patient_ids = np.empty(len(profiles), dtype=object)
+        patient_ids[:] = [profile.patient_id for profile in profiles]
+        return cls(profiles, patient_ids, vital_array, lab_array)
+
+@dataclass(slots=True)
 class ClinicalDecision:
     """Clinical decision recommendation"""
     decision_id: str
@@ -84,7 +456,7 @@ class ClinicalDecision:
     created_at: datetime
     expires_at: datetime
 
-@dataclass
+@dataclass(slots=True)
 class AlertCondition:
     """Clinical alert condition"""
     alert_id: str
@@ -98,6 +470,52 @@ class AlertCondition:
     auto_resolved: bool
     timestamp: datetime
 
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _write_file(path: str, data: bytes):
+    """Write atomically so a concurrent reader never sees a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _pack_decision(decision: ClinicalDecision) -> bytes:
+    """Encode a decision for the Redis cache; datetimes travel as ISO strings"""
+    return msgpack.packb(asdict(decision), default=datetime.isoformat)
+
+def _unpack_decision(payload: bytes) -> ClinicalDecision:
+    """Decode a cached decision, restoring its datetime fields"""
+    data = msgpack.unpackb(payload)
+    data['created_at'] = datetime.fromisoformat(data['created_at'])
+    data['expires_at'] = datetime.fromisoformat(data['expires_at'])
+    return ClinicalDecision(**data)
+
+# One Redis connection pool per process, shared by every engine instance;
+# callers wait up to REDIS_POOL_TIMEOUT for a free connection
+REDIS_MAX_CONNECTIONS = int(os.getenv('CDSS_REDIS_MAX_CONNECTIONS', '64'))
+REDIS_POOL_TIMEOUT = 1.0
+_redis_pool: Optional[redis.BlockingConnectionPool] = None
+_redis_pool_lock = asyncio.Lock()
+
+async def get_redis_pool(host: str, password: str) -> redis.BlockingConnectionPool:
+    """Create the shared TLS connection pool on first use"""
+    global _redis_pool
+    if _redis_pool is None:
+        async with _redis_pool_lock:
+            if _redis_pool is None:
+                _redis_pool = redis.BlockingConnectionPool(
+                    connection_class=redis.SSLConnection,
+                    host=host,
+                    port=6380,
+                    password=password,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    timeout=REDIS_POOL_TIMEOUT
+                )
+    return _redis_pool
+
 class ClinicalDecisionSupportEngine:
     """Advanced Clinical Decision Support System"""
     
@@ -105,8 +523,21 @@ class ClinicalDecisionSupportEngine:
         self.credential = DefaultAzureCredential()
         self.models = {}
         self.scalers = {}
+        # Per-model (mean, scale) so scaling is one fused NumPy expression
+        self.scaler_params = {}
+        self.inference_sessions = {}
         self.feature_columns = {}
         self.redis_client = None
+        # L1 decision cache in front of Redis, keyed by patient id
+        self._decision_l1 = TTLCache(maxsize=DECISION_L1_SIZE, ttl=DECISION_L1_TTL)
+        # Fire-and-forget writes, referenced until they finish
+        self._background_tasks = set()
+        # Interaction risk per medication list; LFU keeps long-stay patients' lists
+        self._drug_risk_cache = LFUCache(maxsize=DRUG_RISK_CACHE_SIZE)
+        # Suffix for alert ids, unique even when the clock stamp repeats
+        self._alert_seq = count()
+        # Gauge children resolved once; patients stay out of metric labels
+        self._risk_gauges = {risk_type: RISK_SCORE_GAUGE.labels(risk_type=risk_type) for risk_type in RISK_SCORE_KEYS}
         self.db_pool = None
         self.blob_client = None
         self.text_analytics_client = None
@@ -131,6 +562,9 @@ class ClinicalDecisionSupportEngine:
             'platelet_count': {'critical_low': 20000, 'low': 50000, 'normal_low': 150000, 'normal_high': 450000, 'high': 600000}
         }
         
+        self._vital_sign_table = build_threshold_table(self.vital_sign_thresholds)
+        self._lab_value_table = build_threshold_table(self.lab_value_thresholds)
+        
     async def initialize(self):
         """Initialize all Azure services and load ML models"""
         try:
@@ -204,34 +638,39 @@ class ClinicalDecisionSupportEngine:
                 "mortality_prediction_model.pkl"
             ]
             
-            for model_file in model_files:
+            scaler_files = [model_file.replace('_model.pkl', '_scaler.pkl') for model_file in model_files]
+            
+            # Download every model and scaler concurrently, then unpickle them
+            # in the default executor so deserialization overlaps as well
+            blobs = await asyncio.gather(*(
+                self._download_blob(container_name, blob_name)
+                for blob_name in model_files + scaler_files
+            ))
+            loop = asyncio.get_running_loop()
+            loaded = await asyncio.gather(*(
+                loop.run_in_executor(None, joblib.load, io.BytesIO(blob_bytes))
+                for blob_bytes in blobs
+            ))
+            
+            for model_file, model, scaler, model_bytes, scaler_bytes in zip(
+                model_files, loaded, loaded[len(model_files):], blobs, blobs[len(model_files):]
+            ):
                 model_name = model_file.replace('.pkl', '').replace('_model', '')
                 
-                # Download model from blob storage
-                blob_client = self.blob_client.get_blob_client(
-                    container=container_name,
-                    blob=model_file
-                )
-                
-                model_data = await blob_client.download_blob()
-                model_bytes = await model_data.readall()
-                
-                # Load model using joblib
-                import io
-                model = joblib.load(io.BytesIO(model_bytes))
+                # Single-threaded predict: joblib worker start-up dwarfs the
+                # tree walk for the small batches scored per request
+                if hasattr(model, 'n_jobs'):
+                    model.n_jobs = 1
                 self.models[model_name] = model
-                
-                # Load corresponding scaler
-                scaler_file = model_file.replace('_model.pkl', '_scaler.pkl')
-                scaler_blob = self.blob_client.get_blob_client(
-                    container=container_name,
-                    blob=scaler_file
-                )
-                
-                scaler_data = await scaler_blob.download_blob()
-                scaler_bytes = await scaler_data.readall()
-                scaler = joblib.load(io.BytesIO(scaler_bytes))
                 self.scalers[model_name] = scaler
+                self.scaler_params[model_name] = (
+                    scaler.mean_.astype(np.float32) if scaler.with_mean else np.float32(0.0),
+                    scaler.scale_.astype(np.float32) if scaler.with_std else np.float32(1.0)
+                )
+                if any(model_name == name for _, name in RISK_MODELS):
+                    # Compiled graphs are keyed by the exact model and scaler they came from
+                    digest = hashlib.sha256(model_bytes + scaler_bytes).hexdigest()[:16]
+                    await asyncio.to_thread(self._compile_model, model_name, model, scaler, digest)
                 
                 logger.info(f"Loaded model: {model_name}")
                 
@@ -239,6 +678,89 @@ class ClinicalDecisionSupportEngine:
             logger.error("Failed to load ML models", error=str(e))
             raise
     
+    async def _download_blob(self, container_name: str, blob_name: str) -> bytes:
+        """Download a blob, reusing the local copy when its ETag is unchanged"""
+        blob_client = self.blob_client.get_blob_client(
+            container=container_name,
+            blob=blob_name
+        )
+        
+        properties = await blob_client.get_blob_properties()
+        etag = properties.etag.strip('"')
+        cache_path = os.path.join(MODEL_CACHE_DIR, f"{etag}_{blob_name}")
+        if os.path.exists(cache_path):
+            return await asyncio.to_thread(_read_file, cache_path)
+        
+        blob_data = await blob_client.download_blob(etag=properties.etag, match_condition=MatchConditions.IfNotModified)
+        blob_bytes = await blob_data.readall()
+        try:
+            await asyncio.to_thread(_write_file, cache_path, blob_bytes)
+        except OSError as e:
+            logger.warning("Could not cache model blob locally", blob=blob_name, error=str(e))
+        return blob_bytes
+    
+    def _compile_model(self, model_name: str, model: Any, scaler: StandardScaler, digest: str):
+        """Compile a fitted scaler and model to one ONNX Runtime session for inference.
+        
+        CPU-bound (conversion and graph optimization), so it is run off the event loop.
+        """
+        try:
+            # Reuse a graph compiled by an earlier start (or baked into the image)
+            onnx_path = os.path.join(MODEL_CACHE_DIR, f"{model_name}-{digest}.onnx")
+            if os.path.exists(onnx_path):
+                onnx_bytes = _read_file(onnx_path)
+            else:
+                # Folding the scaler into the graph lets the session take raw features.
+                # With a float32 input the tree ensemble is emitted with float32
+                # split thresholds, half the node payload of sklearn's float64 trees
+                onnx_bytes = convert_sklearn(
+                    Pipeline([('scaler', scaler), ('model', model)]),
+                    initial_types=[('input', FloatTensorType([None, model.n_features_in_]))],
+                    options={id(model): {'zipmap': False}}
+                ).SerializeToString()
+                try:
+                    _write_file(onnx_path, onnx_bytes)
+                except OSError as e:
+                    logger.warning("Could not cache compiled model locally", model=model_name, error=str(e))
+            
+            session_options = ort.SessionOptions()
+            # Request/response scoring: one thread per call, concurrency across calls
+            session_options.intra_op_num_threads = 1
+            session = ort.InferenceSession(
+                onnx_bytes,
+                sess_options=session_options,
+                providers=['CPUExecutionProvider']
+            )
+            
+            # Probe rows spread around the training distribution the scaler saw
+            rng = np.random.default_rng(0)
+            mean = scaler.mean_ if scaler.with_mean else 0.0
+            scale = scaler.scale_ if scaler.with_std else 1.0
+            probe = (
+                mean + scale * rng.standard_normal((ONNX_PARITY_PROBE_ROWS, model.n_features_in_)) * 2
+            ).astype(np.float32)
+            expected = model.predict_proba(scaler.transform(probe))[:, 1]
+            actual = session.run(None, {'input': probe})[1][:, 1]
+            max_diff = float(np.max(np.abs(actual - expected)))
+            if max_diff > ONNX_PARITY_TOLERANCE:
+                logger.warning(
+                    "ONNX model diverges from sklearn, keeping sklearn",
+                    model=model_name, max_diff=max_diff
+                )
+                return
+            self.inference_sessions[model_name] = session
+        except Exception as e:
+            # Keep serving with the sklearn model
+            logger.warning("ONNX compilation failed", model=model_name, error=str(e))
+    
+    def _predict_risk(self, model_name: str, features: np.ndarray) -> np.ndarray:
+        """Positive-class probability for each row of raw float32 features"""
+        session = self.inference_sessions.get(model_name)
+        if session is not None:
+            return session.run(None, {'input': np.ascontiguousarray(features)})[1][:, 1]
+        mean, scale = self.scaler_params[model_name]
+        return self.models[model_name].predict_proba((features - mean) / scale)[:, 1]
+    
     async def _initialize_database(self):
         """Initialize PostgreSQL database connection"""
         db_host = os.getenv('DB_HOST')
@@ -262,74 +784,125 @@ class ClinicalDecisionSupportEngine:
         redis_password = os.getenv('REDIS_PASSWORD')
         
         self.redis_client = redis.Redis(
-            host=redis_host,
-            port=6380,
-            password=redis_password,
-            ssl=True,
-            decode_responses=True
+            connection_pool=await get_redis_pool(redis_host, redis_password)
         )
     
+    async def get_decisions_batch(self, patient_ids: List[str]) -> Dict[str, ClinicalDecision]:
+        """Fetch cached decisions for several patients: in-process L1 first, then a single MGET"""
+        decisions = {}
+        misses = []
+        for patient_id in patient_ids:
+            decision = self._decision_l1.get(patient_id)
+            if decision is not None:
+                decisions[patient_id] = decision
+            else:
+                misses.append(patient_id)
+        if not misses:
+            return decisions
+        
+        # A slow Redis must not hold up scoring; treat it as a miss
+        try:
+            payloads = await asyncio.wait_for(
+                self.redis_client.mget([f"cdss:decision:{patient_id}" for patient_id in misses]),
+                timeout=DECISION_CACHE_TIMEOUT
+            )
+        except (asyncio.TimeoutError, redis.RedisError) as e:
+            logger.warning("Decision cache lookup skipped", error=str(e) or type(e).__name__)
+            return decisions
+        
+        for patient_id, payload in zip(misses, payloads):
+            if payload:
+                decisions[patient_id] = self._decision_l1[patient_id] = _unpack_decision(payload)
+        return decisions
+    
+    async def _cache_decision(self, decision: ClinicalDecision):
+        """Write a decision through to Redis"""
+        try:
+            await self.redis_client.set(
+                f"cdss:decision:{decision.patient_id}",
+                _pack_decision(decision),
+                ex=DECISION_CACHE_TTL
+            )
+        except redis.RedisError as e:
+            logger.warning("Failed to cache decision", decision_id=decision.decision_id, error=str(e))
+    
     @DECISION_LATENCY.time()
     async def generate_clinical_decision(self, patient_risk_profile: PatientRiskProfile) -> ClinicalDecision:
         """Generate comprehensive clinical decision recommendation"""
-        DECISION_REQUESTS.labels(decision_type='comprehensive').inc()
+        decisions = await self.generate_clinical_decisions_batch([patient_risk_profile])
+        return decisions[0]
+    
+    async def generate_clinical_decisions_batch(self, profiles: List[PatientRiskProfile]) -> List[ClinicalDecision]:
+        """Generate clinical decisions for several patients, scoring uncached ones in one model pass"""
+        DECISION_REQUESTS.labels(decision_type='comprehensive').inc(len(profiles))
+        decisions: List[Optional[ClinicalDecision]] = [None] * len(profiles)
+        pending = []
         
-        try:
-            logger.info("Generating clinical decision", patient_id=patient_risk_profile.patient_id)
-            
-            # Check cache first
-            cache_key = f"cdss:decision:{patient_risk_profile.patient_id}"
-            cached_decision = await self.redis_client.get(cache_key)
+        # Check cache first
+        cached = await self.get_decisions_batch([profile.patient_id for profile in profiles])
+        for index, profile in enumerate(profiles):
+            logger.info("Generating clinical decision", patient_id=profile.patient_id)
+            cached_decision = cached.get(profile.patient_id)
             
             if cached_decision:
-                logger.info("Using cached decision", patient_id=patient_risk_profile.patient_id)
-                return ClinicalDecision(**json.loads(cached_decision))
+                logger.info("Using cached decision", patient_id=profile.patient_id)
+                decisions[index] = cached_decision
+            else:
+                pending.append(index)
+        
+        if pending:
+            # Perform comprehensive risk assessment for all uncached patients at once
+            pending_profiles = [profiles[index] for index in pending]
+            all_risk_scores = await self._calculate_risk_scores_batch(pending_profiles)
+            triage = triage_risk_scores(all_risk_scores)
             
-            # Perform comprehensive risk assessment
-            risk_scores = await self._calculate_risk_scores(patient_risk_profile)
+            for index, profile, risk_scores, (urgency_level, risk_level, follow_up_required) in zip(
+                pending, pending_profiles, all_risk_scores, triage
+            ):
+                decisions[index] = await self._build_decision(
+                    profile, risk_scores, urgency_level, risk_level, follow_up_required
+                )
             
+            # Store the new decisions in one round trip
+            await self._store_decisions_batch([decisions[index] for index in pending])
+        
+        return decisions
+    
+    async def _build_decision(self, patient_risk_profile: PatientRiskProfile, risk_scores: Dict[str, float],
+                              urgency_level: str, risk_level: str, follow_up_required: bool) -> ClinicalDecision:
+        """Turn a patient's risk scores and triage into a cached clinical decision"""
+        try:
             # Generate specific recommendations
             recommendations = await self._generate_recommendations(patient_risk_profile, risk_scores)
             
             # Check for contraindications
             contraindications = await self._check_contraindications(patient_risk_profile)
             
-            # Determine urgency level
-            urgency_level = self._determine_urgency(risk_scores)
-            
             # Create clinical decision
+            now = datetime.now()
             decision = ClinicalDecision(
-                decision_id=f"cdss_{patient_risk_profile.patient_id}_{int(datetime.now().timestamp())}",
+                decision_id=f"cdss_{patient_risk_profile.patient_id}_{time.time_ns()}",
                 patient_id=patient_risk_profile.patient_id,
                 decision_type="comprehensive_assessment",
                 recommendation=recommendations['primary'],
                 confidence_score=recommendations['confidence'],
-                risk_level=self._categorize_risk_level(risk_scores),
+                risk_level=risk_level,
                 supporting_evidence=recommendations['evidence'],
                 contraindications=contraindications,
                 alternative_options=recommendations['alternatives'],
-                follow_up_required=self._requires_follow_up(risk_scores),
+                follow_up_required=follow_up_required,
                 urgency_level=urgency_level,
-                created_at=datetime.now(),
-                expires_at=datetime.now() + timedelta(hours=24)
-            )
-            
-            # Cache the decision
-            await self.redis_client.setex(
-                cache_key,
-                3600,  # 1 hour cache
-                json.dumps(decision.__dict__, default=str)
+                created_at=now,
+                expires_at=now + timedelta(hours=24)
             )
             
-            # Store in database
-            await self._store_decision(decision)
+            # Cache the decision locally now and in Redis in the background
+            self._decision_l1[patient_risk_profile.patient_id] = decision
+            self._run_in_background(self._cache_decision(decision))
             
             # Update risk score metrics
             for risk_type, score in risk_scores.items():
-                RISK_SCORE_GAUGE.labels(
-                    patient_id=patient_risk_profile.patient_id,
-                    risk_type=risk_type
-                ).set(score)
+                self._risk_gauges[risk_type].set(score)
             
             logger.info("Generated clinical decision", 
                        patient_id=patient_risk_profile.patient_id,
@@ -346,368 +919,312 @@ class ClinicalDecisionSupportEngine:
     
     async def _calculate_risk_scores(self, profile: PatientRiskProfile) -> Dict[str, float]:
         """Calculate various risk scores using ML models"""
-        risk_scores = {}
+        risk_scores = await self._calculate_risk_scores_batch([profile])
+        return risk_scores[0]
+    
+    async def _calculate_risk_scores_batch(self, profiles: List[PatientRiskProfile]) -> List[Dict[str, float]]:
+        """Calculate risk scores for several patients with one predict_proba call per model"""
+        all_risk_scores = [{} for _ in profiles]
         
         try:
-            # Prepare feature vector
-            features = self._extract_features(profile)
+            # Extract features once; each model reads its own columns
+            features = self._extract_feature_matrix(profiles)
             
-            # Sepsis risk prediction
-            if 'sepsis_prediction' in self.models:
-                sepsis_features = self.scalers['sepsis_prediction'].transform([features['sepsis']])
-                sepsis_risk = self.models['sepsis_prediction'].predict_proba(sepsis_features)[0][1]
-                risk_scores['sepsis'] = float(sepsis_risk)
+            gates = self._model_gates(profiles, features)
             
-            # Readmission risk
-            if 'readmission_risk' in self.models:
-                readmission_features = self.scalers['readmission_risk'].transform([features['readmission']])
-                readmission_risk = self.models['readmission_risk'].predict_proba(readmission_features)[0][1]
-                risk_scores['readmission'] = float(readmission_risk)
-            
-            # Fall risk
-            if 'fall_risk' in self.models:
-                fall_features = self.scalers['fall_risk'].transform([features['fall']])
-                fall_risk = self.models['fall_risk'].predict_proba(fall_features)[0][1]
-                risk_scores['fall'] = float(fall_risk)
-            
-            # Mortality prediction
-            if 'mortality_prediction' in self.models:
-                mortality_features = self.scalers['mortality_prediction'].transform([features['mortality']])
-                mortality_risk = self.models['mortality_prediction'].predict_proba(mortality_features)[0][1]
-                risk_scores['mortality'] = float(mortality_risk)
+            # Sepsis, readmission, fall and mortality risk; a model only runs
+            # for patients whose rule-based gate fires, the rest get no score
+            # for that risk (triage and recommendations use the scores present)
+            for risk_type, model_name in RISK_MODELS:
+                if model_name not in self.models:
+                    continue
+                rows = np.flatnonzero(gates[risk_type])
+                if not rows.size:
+                    continue
+                model_features = features[:, RISK_FEATURES[risk_type]]
+                if rows.size < len(profiles):
+                    model_features = model_features[rows]
+                risks = self._predict_risk(model_name, model_features)
+                for row, risk in zip(rows, risks):
+                    all_risk_scores[row][risk_type] = float(risk)
             
             # Drug interaction risk
-            drug_interaction_risk = await self._calculate_drug_interaction_risk(profile.current_medications)
-            risk_scores['drug_interaction'] = drug_interaction_risk
+            for risk_scores, profile in zip(all_risk_scores, profiles):
+                risk_scores['drug_interaction'] = await self._calculate_drug_interaction_risk(profile.current_medications)
             
-            return risk_scores
+            return all_risk_scores
             
         except Exception as e:
             logger.error("Failed to calculate risk scores", error=str(e))
-            return {}
-    
-    def _extract_features(self, profile: PatientRiskProfile) -> Dict[str, List[float]]:
-        """Extract features for different ML models"""
-        base_features = [
-            profile.age,
-            1 if profile.gender.lower() == 'male' else 0,
-            len(profile.medical_history),
-            len(profile.current_medications),
-            len(profile.comorbidities)
-        ]
+            return [{} for _ in profiles]
+    
+    def _model_gates(self, profiles: List[PatientRiskProfile], features: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per risk type, a mask of the patients whose rule-based pre-screen warrants the model"""
+        sepsis_vitals = np.zeros(len(profiles), dtype=bool)
+        abnormal_vitals = np.zeros(len(profiles), dtype=bool)
+        critical = np.zeros(len(profiles), dtype=bool)
+        for row, profile in enumerate(profiles):
+            vital_hits = classify_thresholds(profile.vital_signs, self._vital_sign_table)
+            lab_hits = classify_thresholds(profile.lab_results, self._lab_value_table)
+            abnormal_vitals[row] = bool(vital_hits)
+            sepsis_vitals[row] = any(name in SEPSIS_VITAL_SIGNS for name, _, _ in vital_hits)
+            critical[row] = any(THRESHOLD_BOUNDS[bound][1] == 'critical' for _, _, bound in vital_hits + lab_hits)
         
-        # Vital signs features
-        vital_features = [
-            profile.vital_signs.get('systolic_bp', 120),
-            profile.vital_signs.get('diastolic_bp', 80),
-            profile.vital_signs.get('heart_rate', 70),
-            profile.vital_signs.get('temperature', 37.0),
-            profile.vital_signs.get('oxygen_saturation', 98),
-            profile.vital_signs.get('respiratory_rate', 16)
+        column = FEATURE_COLUMNS.index
+        return {
+            # Sepsis: abnormal HR, temperature or RR, or a raised white cell count
+            'sepsis': sepsis_vitals | (
+                features[:, column('white_blood_cells')] > self.lab_value_thresholds['white_blood_cells']['normal_high']
+            ),
+            'readmission': features[:, column('history_count')] >= READMISSION_HISTORY_GATE,
+            'fall': abnormal_vitals | (features[:, column('age')] >= FALL_AGE_GATE),
+            'mortality': critical
+        }
+    
+    def _extract_feature_matrix(self, profiles: List[PatientRiskProfile]) -> np.ndarray:
+        """Extract every model feature for several patients into one (N, len(FEATURE_COLUMNS)) matrix"""
+        features = np.empty((len(profiles), len(FEATURE_COLUMNS)), dtype=np.float32)
+        
+        # Demographic and history features
+        features[:, _BASE_BLOCK] = [
+            (
+                profile.age,
+                profile.gender.lower() == 'male',
+                len(profile.medical_history),
+                len(profile.current_medications),
+                len(profile.comorbidities)
+            )
+            for profile in profiles
         ]
         
-        # Lab results features
-        lab_features = [
-            profile.lab_results.get('glucose', 100),
-            profile.lab_results.get('creatinine', 1.0),
-            profile.lab_results.get('hemoglobin', 14.0),
-            profile.lab_results.get('white_blood_cells', 7000),
-            profile.lab_results.get('platelet_count', 250000)
+        # Vital signs and lab results, with defaults for missing readings
+        features[:, _VITAL_SIGN_BLOCK] = [
+            [profile.vital_signs.get(name, default) for name, default in VITAL_SIGN_FEATURES]
+            for profile in profiles
+        ]
+        features[:, _LAB_RESULT_BLOCK] = [
+            [profile.lab_results.get(name, default) for name, default in LAB_RESULT_FEATURES]
+            for profile in profiles
         ]
         
-        return {
-            'sepsis': base_features + vital_features + lab_features,
-            'readmission': base_features + [len(profile.medical_history)],
-            'fall': base_features + vital_features[:3],  # BP and HR most relevant
-            'mortality': base_features + vital_features + lab_features
-        }
+        return features
     
     async def _calculate_drug_interaction_risk(self, medications: List[str]) -> float:
         """Calculate drug interaction risk score"""
         if len(medications) < 2:
             return 0.0
         
-        # High-risk drug combinations (simplified for demo)
-        high_risk_combinations = {
-            ('warfarin', 'aspirin'): 0.8,
-            ('digoxin', 'quinidine'): 0.9,
-            ('phenytoin', 'warfarin'): 0.7,
-            ('metformin', 'contrast_dye'): 0.6
-        }
-        
-        max_risk = 0.0
-        for i, med1 in enumerate(medications):
-            for med2 in medications[i+1:]:
-                combination = tuple(sorted([med1.lower(), med2.lower()]))
-                risk = high_risk_combinations.get(combination, 0.1)
-                max_risk = max(max_risk, risk)
+        # Medication lists are stable across repeat evaluations of a patient
+        key = tuple(medications)
+        risk = self._drug_risk_cache.get(key)
+        if risk is not None:
+            return risk
         
-        return max_risk
+        # Only medications that appear in a known combination can raise the
+        # risk above baseline; map them to ids once and scan id pairs
+        med_ids = sorted({
+            INTERACTION_MED_IDS[med]
+            for med in map(str.lower, medications) if med in INTERACTION_MED_IDS
+        })
+        risk = max(
+            (INTERACTION_PAIR_RISK.get(lo * _MED_COUNT + hi, BASELINE_INTERACTION_RISK)
+             for lo, hi in combinations(med_ids, 2)),
+            default=BASELINE_INTERACTION_RISK
+        )
+        self._drug_risk_cache[key] = risk
+        return risk
     
     async def _generate_recommendations(self, profile: PatientRiskProfile, risk_scores: Dict[str, float]) -> Dict[str, Any]:
         """Generate clinical recommendations based on risk assessment"""
-        recommendations = {
-            'primary': '',
-            'alternatives': [],
-            'evidence': [],
-            'confidence': 0.0
+        primary, alternatives, evidence, confidence = recommend_for_risk_scores(tuple(risk_scores.items()))
+        return {
+            'primary': primary,
+            'alternatives': list(alternatives),
+            'evidence': list(evidence),
+            'confidence': confidence
         }
-        
-        # Determine primary recommendation based on highest risk
-        if not risk_scores:
-            recommendations['primary'] = "Continue standard care monitoring"
-            recommendations['confidence'] = 0.5
-            return recommendations
-        
-        max_risk_type = max(risk_scores, key=risk_scores.get)
-        max_risk_score = risk_scores[max_risk_type]
-        
-        if max_risk_type == 'sepsis' and max_risk_score > 0.7:
-            recommendations['primary'] = "Immediate sepsis protocol initiation recommended"
-            recommendations['alternatives'] = [
-                "Broad-spectrum antibiotic therapy",
-                "Fluid resuscitation",
-                "Lactate monitoring"
-            ]
-            recommendations['evidence'] = [
-                f"Sepsis risk score: {max_risk_score:.2f}",
-                "Elevated vital signs consistent with SIRS criteria"
-            ]
-            recommendations['confidence'] = max_risk_score
-        
-        elif max_risk_type == 'fall' and max_risk_score > 0.6:
-            recommendations['primary'] = "Fall prevention measures implementation"
-            recommendations['alternatives'] = [
-                "Bed alarm activation",
-                "Physical therapy consultation",
-                "Medication review for sedating effects"
-            ]
-            recommendations['evidence'] = [
-                f"Fall risk score: {max_risk_score:.2f}",
-                "Multiple risk factors present"
-            ]
-            recommendations['confidence'] = max_risk_score
-        
-        elif max_risk_type == 'drug_interaction' and max_risk_score > 0.5:
-            recommendations['primary'] = "Medication review and adjustment required"
-            recommendations['alternatives'] = [
-                "Pharmacist consultation",
-                "Alternative medication selection",
-                "Enhanced monitoring protocols"
-            ]
-            recommendations['evidence'] = [
-                f"Drug interaction risk: {max_risk_score:.2f}",
-                "Multiple medications with potential interactions"
-            ]
-            recommendations['confidence'] = max_risk_score
-        
-        else:
-            recommendations['primary'] = "Continue current care plan with routine monitoring"
-            recommendations['confidence'] = 1.0 - max_risk_score
-        
-        return recommendations
     
     async def _check_contraindications(self, profile: PatientRiskProfile) -> List[str]:
         """Check for contraindications based on patient profile"""
-        contraindications = []
-        
-        # Check age-related contraindications
-        if profile.age > 65:
-            contraindications.append("Consider age-adjusted dosing for medications")
-        
-        # Check for specific medical conditions
-        high_risk_conditions = ['renal_failure', 'liver_disease', 'heart_failure']
-        for condition in profile.medical_history:
-            if any(risk_condition in condition.lower() for risk_condition in high_risk_conditions):
-                contraindications.append(f"Contraindication due to {condition}")
-        
-        # Check vital sign abnormalities
-        if profile.vital_signs.get('systolic_bp', 120) > 180:
-            contraindications.append("Severe hypertension - avoid vasoconstrictors")
-        
-        if profile.vital_signs.get('heart_rate', 70) > 120:
-            contraindications.append("Tachycardia - avoid stimulants")
-        
-        return contraindications
-    
-    def _determine_urgency(self, risk_scores: Dict[str, float]) -> str:
-        """Determine urgency level based on risk scores"""
-        if not risk_scores:
-            return "routine"
-        
-        max_risk = max(risk_scores.values())
-        
-        if max_risk > 0.8:
-            return "critical"
-        elif max_risk > 0.6:
-            return "urgent"
-        elif max_risk > 0.4:
-            return "priority"
-        else:
-            return "routine"
-    
-    def _categorize_risk_level(self, risk_scores: Dict[str, float]) -> str:
-        """Categorize overall risk level"""
-        if not risk_scores:
-            return "low"
-        
-        avg_risk = sum(risk_scores.values()) / len(risk_scores)
-        
-        if avg_risk > 0.7:
-            return "high"
-        elif avg_risk > 0.4:
-            return "moderate"
-        else:
-            return "low"
-    
-    def _requires_follow_up(self, risk_scores: Dict[str, float]) -> bool:
-        """Determine if follow-up is required"""
-        if not risk_scores:
-            return False
-        
-        return any(score > 0.5 for score in risk_scores.values())
+        return list(contraindications_for(
+            profile.age > 65,
+            tuple(profile.medical_history),
+            profile.vital_signs.get('systolic_bp', 120),
+            profile.vital_signs.get('heart_rate', 70)
+        ))
     
     async def _store_decision(self, decision: ClinicalDecision):
         """Store clinical decision in database"""
+        await self._store_decisions_batch([decision])
+    
+    async def _store_decisions_batch(self, decisions: List[ClinicalDecision]):
+        """Store several clinical decisions with a single COPY"""
+        if not decisions:
+            return
+        
         try:
-            query = """
-                INSERT INTO clinical_decisions 
-                (decision_id, patient_id, decision_type, recommendation, confidence_score, 
-                 risk_level, supporting_evidence, contraindications, alternative_options, 
-                 follow_up_required, urgency_level, created_at, expires_at)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-            """
-            
-            async with self.db_pool.acquire() as conn:
-                await conn.execute(
-                    query,
+            records = [
+                (
                     decision.decision_id,
                     decision.patient_id,
                     decision.decision_type,
                     decision.recommendation,
                     decision.confidence_score,
                     decision.risk_level,
-                    json.dumps(decision.supporting_evidence),
-                    json.dumps(decision.contraindications),
-                    json.dumps(decision.alternative_options),
+                    orjson.dumps(decision.supporting_evidence).decode(),
+                    orjson.dumps(decision.contraindications).decode(),
+                    orjson.dumps(decision.alternative_options).decode(),
                     decision.follow_up_required,
                     decision.urgency_level,
                     decision.created_at,
                     decision.expires_at
                 )
+                for decision in decisions
+            ]
+            
+            async with self.db_pool.acquire() as conn:
+                await conn.copy_records_to_table(
+                    'clinical_decisions',
+                    records=records,
+                    columns=DECISION_COLUMNS
+                )
                 
         except Exception as e:
-            logger.error("Failed to store decision", decision_id=decision.decision_id, error=str(e))
+            logger.error("Failed to store decisions",
+                        decision_ids=[decision.decision_id for decision in decisions],
+                        error=str(e))
     
     async def generate_clinical_alerts(self, profile: PatientRiskProfile) -> List[AlertCondition]:
         """Generate clinical alerts based on patient condition"""
-        alerts = []
+        # Threshold rules are indexed by measurement, so only the readings the
+        # profile carries are evaluated. The interaction rule needs a pair of
+        # medications; otherwise skip it. When it applies, start it and yield
+        # once so it can issue its lookups while the CPU-only checks run
+        medication_check = None
+        if len(profile.current_medications) >= 2:
+            medication_check = asyncio.create_task(self._check_medication_alerts(profile))
+            await asyncio.sleep(0)
         
-        try:
-            # Vital signs alerts
-            vital_alerts = self._check_vital_sign_alerts(profile)
-            alerts.extend(vital_alerts)
-            
-            # Lab value alerts
-            lab_alerts = self._check_lab_value_alerts(profile)
-            alerts.extend(lab_alerts)
-            
-            # Medication alerts
-            med_alerts = await self._check_medication_alerts(profile)
-            alerts.extend(med_alerts)
-            
-            # Store alerts in database
-            for alert in alerts:
-                await self._store_alert(alert)
-            
-            return alerts
-            
-        except Exception as e:
-            logger.error("Failed to generate clinical alerts", 
-                        patient_id=profile.patient_id, error=str(e))
-            return []
-    
-    def _check_vital_sign_alerts(self, profile: PatientRiskProfile) -> List[AlertCondition]:
-        """Check for vital sign-based alerts"""
+        # Each check fails on its own: one broken rule set must not hide the others
         alerts = []
+        for check in (self._check_vital_sign_alerts, self._check_lab_value_alerts):
+            try:
+                alerts.extend(check(profile))
+            except Exception as e:
+                logger.error("Clinical alert check failed",
+                            check=check.__name__, patient_id=profile.patient_id, error=str(e))
         
-        for vital_sign, value in profile.vital_signs.items():
-            if vital_sign in self.vital_sign_thresholds:
-                thresholds = self.vital_sign_thresholds[vital_sign]
-                
-                severity = None
-                message = None
-                
-                if 'critical_high' in thresholds and value >= thresholds['critical_high']:
-                    severity = "critical"
-                    message = f"Critical high {vital_sign}: {value}"
-                elif 'critical_low' in thresholds and value <= thresholds['critical_low']:
-                    severity = "critical"
-                    message = f"Critical low {vital_sign}: {value}"
-                elif 'high' in thresholds and value >= thresholds['high']:
-                    severity = "high"
-                    message = f"High {vital_sign}: {value}"
-                elif 'low' in thresholds and value <= thresholds['low']:
-                    severity = "high"
-                    message = f"Low {vital_sign}: {value}"
-                
-                if severity:
-                    alert = AlertCondition(
-                        alert_id=f"vital_{profile.patient_id}_{vital_sign}_{int(datetime.now().timestamp())}",
-                        patient_id=profile.patient_id,
-                        alert_type="vital_signs",
-                        severity=severity,
-                        message=message,
-                        triggered_by=vital_sign,
-                        conditions_met=[f"{vital_sign} = {value}"],
-                        recommended_actions=self._get_vital_sign_actions(vital_sign, severity),
-                        auto_resolved=False,
-                        timestamp=datetime.now()
-                    )
-                    alerts.append(alert)
+        if medication_check is not None:
+            try:
+                alerts.extend(await medication_check)
+            except Exception as e:
+                logger.error("Clinical alert check failed",
+                            check="_check_medication_alerts", patient_id=profile.patient_id, error=str(e))
+        
+        # Store alerts in database without holding up the caller
+        self._run_in_background(self._store_alerts_batch(alerts))
         
         return alerts
     
-    def _check_lab_value_alerts(self, profile: PatientRiskProfile) -> List[AlertCondition]:
-        """Check for lab value-based alerts"""
-        alerts = []
+    async def generate_clinical_alerts_batch(self, profiles: List[PatientRiskProfile]) -> List[List[AlertCondition]]:
+        """Generate clinical alerts for several patients, sweeping threshold rules over the whole batch at once"""
+        # Interaction checks run as tasks, as in generate_clinical_alerts
+        medication_checks = {
+            row: asyncio.create_task(self._check_medication_alerts(profile))
+            for row, profile in enumerate(profiles) if len(profile.current_medications) >= 2
+        }
+        if medication_checks:
+            await asyncio.sleep(0)
         
-        for lab_test, value in profile.lab_results.items():
-            if lab_test in self.lab_value_thresholds:
-                thresholds = self.lab_value_thresholds[lab_test]
-                
-                severity = None
-                message = None
-                
-                if 'critical_high' in thresholds and value >= thresholds['critical_high']:
-                    severity = "critical"
-                    message = f"Critical high {lab_test}: {value}"
-                elif 'critical_low' in thresholds and value <= thresholds['critical_low']:
-                    severity = "critical"
-                    message = f"Critical low {lab_test}: {value}"
-                elif 'high' in thresholds and value >= thresholds['high']:
-                    severity = "high"
-                    message = f"High {lab_test}: {value}"
-                elif 'low' in thresholds and value <= thresholds['low']:
-                    severity = "high"
-                    message = f"Low {lab_test}: {value}"
-                
-                if severity:
-                    alert = AlertCondition(
-                        alert_id=f"lab_{profile.patient_id}_{lab_test}_{int(datetime.now().timestamp())}",
-                        patient_id=profile.patient_id,
-                        alert_type="laboratory",
-                        severity=severity,
-                        message=message,
-                        triggered_by=lab_test,
-                        conditions_met=[f"{lab_test} = {value}"],
-                        recommended_actions=self._get_lab_value_actions(lab_test, severity),
-                        auto_resolved=False,
-                        timestamp=datetime.now()
+        all_alerts = [[] for _ in profiles]
+        stamp_ns = time.time_ns()
+        now = datetime.now()
+        batch = PatientRiskProfileBatch.from_profiles(
+            profiles, list(self._vital_sign_table[0]), list(self._lab_value_table[0])
+        )
+        
+        # Vital signs then lab results: one (N, K) mask per rule set, and alert
+        # objects only for the (patient, measurement) pairs that fired
+        for readings_field, values, table, make_alert in (
+            ('vital_signs', batch.vital_array, self._vital_sign_table, self._vital_sign_alert),
+            ('lab_results', batch.lab_array, self._lab_value_table, self._lab_value_alert)
+        ):
+            try:
+                names = list(table[0])
+                for row, column, bound in zip(*classify_thresholds_batch(values, table)):
+                    profile, name = batch.profiles[row], names[column]
+                    # Messages quote the reading as the caller supplied it
+                    all_alerts[row].append(
+                        make_alert(profile, name, getattr(profile, readings_field)[name], int(bound), stamp_ns, now)
                     )
-                    alerts.append(alert)
+            except Exception as e:
+                logger.error("Clinical alert sweep failed", readings=readings_field,
+                            patients=len(profiles), error=str(e))
         
-        return alerts
+        results = await asyncio.gather(*medication_checks.values(), return_exceptions=True)
+        for row, result in zip(medication_checks, results):
+            if isinstance(result, BaseException):
+                logger.error("Clinical alert check failed", check="_check_medication_alerts",
+                            patient_id=profiles[row].patient_id, error=str(result))
+            else:
+                all_alerts[row].extend(result)
+        
+        # Store every patient's alerts in one background write
+        self._run_in_background(self._store_alerts_batch([alert for alerts in all_alerts for alert in alerts]))
+        
+        return all_alerts
+    
+    def _check_vital_sign_alerts(self, profile: PatientRiskProfile) -> List[AlertCondition]:
+        """Check for vital sign-based alerts"""
+        stamp_ns = time.time_ns()
+        now = datetime.now()
+        return [
+            self._vital_sign_alert(profile, vital_sign, value, bound, stamp_ns, now)
+            for vital_sign, value, bound in classify_thresholds(profile.vital_signs, self._vital_sign_table)
+        ]
+    
+    def _check_lab_value_alerts(self, profile: PatientRiskProfile) -> List[AlertCondition]:
+        """Check for lab value-based alerts"""
+        stamp_ns = time.time_ns()
+        now = datetime.now()
+        return [
+            self._lab_value_alert(profile, lab_test, value, bound, stamp_ns, now)
+            for lab_test, value, bound in classify_thresholds(profile.lab_results, self._lab_value_table)
+        ]
+    
+    def _vital_sign_alert(self, profile: PatientRiskProfile, vital_sign: str, value: float,
+                          bound: int, stamp_ns: int, now: datetime) -> AlertCondition:
+        """Alert for a vital sign that crossed the given THRESHOLD_BOUNDS entry"""
+        _, severity, label = THRESHOLD_BOUNDS[bound]
+        return AlertCondition(
+            alert_id=f"vital_{profile.patient_id}_{vital_sign}_{stamp_ns}_{next(self._alert_seq)}",
+            patient_id=profile.patient_id,
+            alert_type="vital_signs",
+            severity=severity,
+            message=f"{label} {vital_sign}: {value}",
+            triggered_by=vital_sign,
+            conditions_met=[f"{vital_sign} = {value}"],
+            recommended_actions=self._get_vital_sign_actions(vital_sign),
+            auto_resolved=False,
+            timestamp=now
+        )
+    
+    def _lab_value_alert(self, profile: PatientRiskProfile, lab_test: str, value: float,
+                         bound: int, stamp_ns: int, now: datetime) -> AlertCondition:
+        """Alert for a lab value that crossed the given THRESHOLD_BOUNDS entry"""
+        _, severity, label = THRESHOLD_BOUNDS[bound]
+        return AlertCondition(
+            alert_id=f"lab_{profile.patient_id}_{lab_test}_{stamp_ns}_{next(self._alert_seq)}",
+            patient_id=profile.patient_id,
+            alert_type="laboratory",
+            severity=severity,
+            message=f"{label} {lab_test}: {value}",
+            triggered_by=lab_test,
+            conditions_met=[f"{lab_test} = {value}"],
+            recommended_actions=self._get_lab_value_actions(lab_test),
+            auto_resolved=False,
+            timestamp=now
+        )
     
     async def _check_medication_alerts(self, profile: PatientRiskProfile) -> List[AlertCondition]:
         """Check for medication-related alerts"""
@@ -717,8 +1234,9 @@ class ClinicalDecisionSupportEngine:
         interaction_risk = await self._calculate_drug_interaction_risk(profile.current_medications)
         
         if interaction_risk > 0.5:
+            now = datetime.now()
             alert = AlertCondition(
-                alert_id=f"med_{profile.patient_id}_interaction_{int(datetime.now().timestamp())}",
+                alert_id=f"med_{profile.patient_id}_interaction_{time.time_ns()}_{next(self._alert_seq)}",
                 patient_id=profile.patient_id,
                 alert_type="medication",
                 severity="high" if interaction_risk > 0.7 else "medium",
@@ -731,91 +1249,75 @@ class ClinicalDecisionSupportEngine:
                     "Implement enhanced monitoring"
                 ],
                 auto_resolved=False,
-                timestamp=datetime.now()
+                timestamp=now
             )
             alerts.append(alert)
         
         return alerts
     
-    def _get_vital_sign_actions(self, vital_sign: str, severity: str) -> List[str]:
+    def _get_vital_sign_actions(self, vital_sign: str) -> List[str]:
         """Get recommended actions for vital sign alerts"""
-        actions = {
-            'systolic_bp': [
-                "Repeat blood pressure measurement",
-                "Assess for hypertensive emergency",
-                "Consider antihypertensive therapy"
-            ],
-            'heart_rate': [
-                "Obtain 12-lead ECG",
-                "Assess hemodynamic stability",
-                "Consider cardiac monitoring"
-            ],
-            'temperature': [
-                "Investigate infection source",
-                "Consider blood cultures",
-                "Implement fever management"
-            ],
-            'oxygen_saturation': [
-                "Administer supplemental oxygen",
-                "Assess respiratory status",
-                "Consider arterial blood gas"
-            ]
-        }
-        
-        return actions.get(vital_sign, ["Notify physician immediately"])
+        return list(VITAL_SIGN_ACTIONS.get(vital_sign, DEFAULT_ALERT_ACTIONS))
     
-    def _get_lab_value_actions(self, lab_test: str, severity: str) -> List[str]:
+    def _get_lab_value_actions(self, lab_test: str) -> List[str]:
         """Get recommended actions for lab value alerts"""
-        actions = {
-            'glucose': [
-                "Check point-of-care glucose",
-                "Assess for diabetic emergency",
-                "Review insulin/diabetes medications"
-            ],
-            'creatinine': [
-                "Assess kidney function",
-                "Review nephrotoxic medications",
-                "Consider nephrology consultation"
-            ],
-            'hemoglobin': [
-                "Assess for bleeding",
-                "Consider transfusion if indicated",
-                "Investigate cause of anemia"
-            ]
-        }
-        
-        return actions.get(lab_test, ["Notify physician immediately"])
+        return list(LAB_VALUE_ACTIONS.get(lab_test, DEFAULT_ALERT_ACTIONS))
     
     async def _store_alert(self, alert: AlertCondition):
         """Store clinical alert in database"""
+        await self._store_alerts_batch([alert])
+    
+    async def _store_alerts_batch(self, alerts: List[AlertCondition]):
+        """Store several clinical alerts in one round trip"""
+        if not alerts:
+            return
+        
         try:
-            query = """
-                INSERT INTO clinical_alerts 
-                (alert_id, patient_id, alert_type, severity, message, triggered_by,
-                 conditions_met, recommended_actions, auto_resolved, timestamp)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-            """
-            
-            async with self.db_pool.acquire() as conn:
-                await conn.execute(
-                    query,
+            records = [
+                (
                     alert.alert_id,
                     alert.patient_id,
                     alert.alert_type,
                     alert.severity,
                     alert.message,
                     alert.triggered_by,
-                    json.dumps(alert.conditions_met),
-                    json.dumps(alert.recommended_actions),
+                    orjson.dumps(alert.conditions_met).decode(),
+                    orjson.dumps(alert.recommended_actions).decode(),
                     alert.auto_resolved,
                     alert.timestamp
                 )
+                for alert in alerts
+            ]
+            
+            async with self.db_pool.acquire() as conn:
+                # A typical patient raises a handful of alerts: a pipelined
+                # prepared INSERT beats COPY's setup until the batch is large
+                if len(records) > ALERT_COPY_THRESHOLD:
+                    await conn.copy_records_to_table(
+                        'clinical_alerts',
+                        records=records,
+                        columns=ALERT_COLUMNS
+                    )
+                else:
+                    await conn.executemany(INSERT_ALERT_QUERY, records)
                 
         except Exception as e:
-            logger.error("Failed to store alert", alert_id=alert.alert_id, error=str(e))
+            logger.error("Failed to store alerts",
+                        alert_ids=[alert.alert_id for alert in alerts],
+                        error=str(e))
+    
+    def _run_in_background(self, coro):
+        """Schedule a fire-and-forget write, holding a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
     
     async def cleanup(self):
         """Cleanup resources"""
+        # Let in-flight cache and alert writes finish before closing their clients
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        
         if self.redis_client:
             await self.redis_client.close()
         